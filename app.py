@@ -4,9 +4,16 @@ from flask_jwt_extended import JWTManager
 from marshmallow import ValidationError
 from flask_apispec.extension import FlaskApiSpec
 
-from common.blocklist import BLOCKLIST
+from common.blocklist import blocklist
+from common.cache import response_cache
+from common.passwords import HashingBusy, password_hasher
 from common.db import db
+from common.metrics import metrics
+from common.profiler import slow_query_log
+from common.replicas import replicas
 from common.marshal import marshy
+from common.migrate import check_schema_version, db_cli
+from common.partitions import create_future_partitions, partitions_cli
 from dotenv import load_dotenv
 
 from resources.user import (
@@ -20,22 +27,36 @@ from resources.user import (
     UpdatePassword,
 )
 
-from resources.customer import Customer, AllCustomers, CustomerSearch, NewCustomer
+from resources.customer import (
+    Customer,
+    AllCustomers,
+    CustomerSearch,
+    CustomerStatement,
+    NewCustomer,
+    CustomerImport,
+    CustomerImportStatus,
+)
 from resources.transaction import (
     Transaction,
     TransactionList,
     TransactionSearch,
     NewTransaction,
+    TransactionExport,
+    BulkTransactions,
 )
+from resources.search import UnifiedSearch
+from resources.report import TransactionTotals
+from resources.admin import SlowQueries
+from common.importer import customer_importer
+from common.rollup import rollup_cli
+from common.serializers import serializers_cli
+from common.uploads import imports
+from flask_uploads import configure_uploads
 
 
-app = Flask(__name__)
-load_dotenv(".env", verbose=True)
-app.config.from_object("default_config")
-app.config.from_envvar("APPLICATON_SETTINGS")
-api = Api(app)
-jwt = JWTManager(app)
-docs = FlaskApiSpec(app)
+api = Api()
+jwt = JWTManager()
+docs = FlaskApiSpec()
 
 
 # do noi use. Needs fixin'
@@ -55,7 +76,7 @@ def expired_token_callback(jwt_headers, jwt_payload):
 
 @jwt.token_in_blocklist_loader
 def check_if_token_in_blocklist(jwt_header, jwt_payload):
-    return jwt_payload["jti"] in BLOCKLIST
+    return blocklist.contains(jwt_payload["jti"], jwt_payload["exp"])
 
 
 @jwt.invalid_token_loader
@@ -107,16 +128,23 @@ def revoked_token_callback(jwt_header, jwt_payload):
     )
 
 
-@app.before_first_request
-def create_db():
-    db.create_all()
-
-
-@app.errorhandler(ValidationError)
 def handle_marshmallow_validation(err):
     return jsonify(err.messages), 400
 
 
+def handle_hashing_busy(err):
+    return (
+        jsonify(
+            {
+                "description": "Too many logins in progress, try again shortly.",
+                "error": "server_busy.",
+            }
+        ),
+        503,
+        {"Retry-After": str(err.retry_after)},
+    )
+
+
 api.add_resource(UserRegistration, "/register")
 api.add_resource(User, "/user/<int:user_id>")
 api.add_resource(UpdatePassword, "/user/change_password/<int:user_id>")
@@ -127,12 +155,20 @@ api.add_resource(AllUsers, "/users")
 api.add_resource(UserSearch, "/users/search/<string:term>")
 api.add_resource(NewCustomer, "/customer/new")
 api.add_resource(Customer, "/customer/<int:account_id>")
+api.add_resource(CustomerStatement, "/customer/<int:account_id>/statement")
 api.add_resource(AllCustomers, "/customers")
 api.add_resource(CustomerSearch, "/customers/search/<string:term>")
+api.add_resource(CustomerImport, "/customers/import")
+api.add_resource(CustomerImportStatus, "/customers/import/<int:job_id>")
 api.add_resource(NewTransaction, "/transaction/new")
 api.add_resource(Transaction, "/transaction/<int:transaction_id>")
 api.add_resource(TransactionList, "/transactions")
 api.add_resource(TransactionSearch, "/transactions/search/<string:term>")
+api.add_resource(TransactionExport, "/transactions/export")
+api.add_resource(UnifiedSearch, "/search")
+api.add_resource(TransactionTotals, "/reports/transactions")
+api.add_resource(BulkTransactions, "/transactions/bulk")
+api.add_resource(SlowQueries, "/admin/slow-queries")
 
 docs.register(User)
 docs.register(UserRegistration)
@@ -145,15 +181,56 @@ docs.register(Customer)
 docs.register(AllCustomers)
 docs.register(NewCustomer)
 docs.register(CustomerSearch)
+docs.register(CustomerStatement)
+docs.register(CustomerImport)
+docs.register(CustomerImportStatus)
 docs.register(NewTransaction)
 docs.register(Transaction)
 docs.register(TransactionList)
 docs.register(TransactionSearch)
+docs.register(TransactionExport)
+docs.register(UnifiedSearch)
+docs.register(TransactionTotals)
+docs.register(BulkTransactions)
+docs.register(SlowQueries)
+
+
+def create_app() -> Flask:
+    app = Flask(__name__)
+    load_dotenv(".env", verbose=True)
+    app.config.from_object("default_config")
+    app.config.from_envvar("APPLICATON_SETTINGS")
+
+    metrics.init_app(app)
+    slow_query_log.init_app(app)
+    replicas.init_app(app)
+    db.init_app(app)
+    marshy.init_app(app)
+    blocklist.init_app(app)
+    response_cache.init_app(app)
+    password_hasher.init_app(app)
+    configure_uploads(app, imports)
+    customer_importer.init_app(app)
+
+    api.init_app(app)
+    jwt.init_app(app)
+    docs.init_app(app)
+
+    app.register_error_handler(ValidationError, handle_marshmallow_validation)
+    app.register_error_handler(HashingBusy, handle_hashing_busy)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(rollup_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(serializers_cli)
+
+    return app
 
 
 def main() -> None:
-    db.init_app(app)
-    marshy.init_app(app)
+    app = create_app()
+    check_schema_version(app)
+    create_future_partitions(app)
+    customer_importer.fail_abandoned()
     app.run(port=5000)
 
 
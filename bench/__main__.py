@@ -0,0 +1,117 @@
+"""Benchmark the API against generated data.
+
+    python -m bench seed --customers 100000 --transactions 5000000
+    python -m bench run --url http://localhost:5000 --out before.json
+    python -m bench compare before.json after.json
+"""
+import json
+import sys
+from typing import Tuple
+
+import click
+
+from bench.compare import compare
+from bench.run import SCENARIOS, run
+
+
+@click.group()
+def cli() -> None:
+    """Seed a benchmark database, load-test the API and compare runs."""
+
+
+@cli.command("seed")
+@click.option("--customers", default=100000, show_default=True)
+@click.option("--transactions", default=5000000, show_default=True)
+@click.option("--users", default=20, show_default=True)
+@click.option("--days", default=730, show_default=True, help="Days of history.")
+@click.option("--seed", "random_seed", default=1, show_default=True)
+@click.option("--batch", default=50000, show_default=True, help="Rows per COPY.")
+@click.confirmation_option(
+    prompt="This replaces every customer, user and transaction. Continue?"
+)
+def seed_command(
+    customers: int,
+    transactions: int,
+    users: int,
+    days: int,
+    random_seed: int,
+    batch: int,
+) -> None:
+    """Replace the database contents with deterministic generated data."""
+    from app import create_app
+    from bench.data import seed
+    from common.migrate import check_schema_version
+
+    app = create_app()
+    check_schema_version(app)
+    with app.app_context():
+        seed(customers, transactions, users, days, random_seed, batch, click.echo)
+
+
+@cli.command("run")
+@click.option("--url", default="http://localhost:5000", show_default=True)
+@click.option(
+    "--scenario",
+    "names",
+    multiple=True,
+    type=click.Choice(list(SCENARIOS)),
+    help="Repeat to pick several; all by default.",
+)
+@click.option("--concurrency", default=8, show_default=True)
+@click.option(
+    "--duration", default=30.0, show_default=True, help="Seconds per scenario."
+)
+@click.option(
+    "--warmup", default=5.0, show_default=True, help="Unrecorded seconds first."
+)
+@click.option("--seed", "random_seed", default=1, show_default=True)
+@click.option("--customers", default=100000, show_default=True, help="As seeded.")
+@click.option("--transactions", default=5000000, show_default=True, help="As seeded.")
+@click.option("--users", default=20, show_default=True, help="As seeded.")
+@click.option("--out", type=click.File("w"), default="-", help="JSON report file.")
+def run_command(
+    url: str,
+    names: Tuple[str, ...],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    random_seed: int,
+    customers: int,
+    transactions: int,
+    users: int,
+    out,
+) -> None:
+    """Drive each scenario at a fixed concurrency and write a JSON report."""
+    sizes = {"customers": customers, "transactions": transactions, "users": users}
+    report = run(
+        url,
+        names or list(SCENARIOS),
+        sizes,
+        concurrency,
+        duration,
+        warmup,
+        random_seed,
+        lambda line: click.echo(line, err=True),
+    )
+    json.dump(report, out, indent=2)
+    out.write("\n")
+
+
+@cli.command("compare")
+@click.argument("base", type=click.File())
+@click.argument("new", type=click.File())
+@click.option(
+    "--threshold", default=10.0, show_default=True, help="Allowed p95 growth, %."
+)
+def compare_command(base, new, threshold: float) -> None:
+    """Show two reports side by side; exit 1 if any scenario regressed."""
+    lines, regressions = compare(json.load(base), json.load(new), threshold)
+    for line in lines:
+        click.echo(line)
+    if regressions:
+        click.echo(f"Regressed: {', '.join(regressions)}", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    cli()
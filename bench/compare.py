@@ -0,0 +1,44 @@
+from typing import Dict, List, Optional, Tuple
+
+COMPARED = ("throughput", "p50_ms", "p95_ms", "p99_ms", "sql_per_request")
+
+
+def _change(base: Optional[float], new: Optional[float]) -> Optional[float]:
+    if base is None or new is None or base == 0:
+        return None
+
+    return round((new - base) / base * 100, 1)
+
+
+def compare(base: Dict, new: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Table lines for two run reports, and the scenarios that regressed.
+
+    A scenario regresses when its p95 latency grows by more than `threshold`
+    percent, or it runs more SQL statements per request than before.
+    """
+    lines = [f"{'scenario':28} " + " ".join(f"{column:>24}" for column in COMPARED)]
+    regressions = []
+    for name, result in new["scenarios"].items():
+        before = base["scenarios"].get(name)
+        if before is None:
+            lines.append(f"{name:28} (not in the base run)")
+            continue
+
+        cells = []
+        for column in COMPARED:
+            change = _change(before[column], result[column])
+            cell = f"{before[column]} -> {result[column]}"
+            if change is not None:
+                cell += f" ({change:+}%)"
+            cells.append(f"{cell:>24}")
+        lines.append(f"{name:28} " + " ".join(cells))
+
+        p95 = _change(before["p95_ms"], result["p95_ms"])
+        if (p95 is not None and p95 > threshold) or (
+            before["sql_per_request"] is not None
+            and result["sql_per_request"] is not None
+            and result["sql_per_request"] > before["sql_per_request"]
+        ):
+            regressions.append(name)
+
+    return lines, regressions
@@ -0,0 +1,209 @@
+import io
+import random
+from datetime import date, timedelta
+from typing import Callable, Iterator, List, Sequence, Tuple
+
+import bcrypt
+from sqlalchemy import text
+
+from common.db import db
+from common.partitions import create_partitions
+from models.transaction_model import TransactionModel
+
+FIRST_NAMES = (
+    "James Mary Robert Patricia John Jennifer Michael Linda David Elizabeth "
+    "William Barbara Richard Susan Joseph Jessica Thomas Sarah Charles Karen "
+    "Andre Keisha Marlon Shanice Dwayne Tamika Omar Latoya Kemar Simone"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez "
+    "Campbell Thompson Clarke Robinson Walker Wright Lewis Allen Young King "
+    "Grant Reid Morgan Bailey Edwards Henry Francis Gordon Spencer Stewart"
+).split()
+STREETS = (
+    "Main Church Hope Mountain View Old Harbour Constant Spring Red Hills "
+    "Molynes Barbican Half Way Tree Orange Duke King Market"
+).split()
+SERVICE_TYPES = ("residential", "commercial", "industrial", "government")
+UTILITIES = ("water", "electricity", "gas", "internet", "cable")
+PAYMENT_TYPES = ("cash", "card", "cheque", "transfer")
+PROCESSORS = ("front desk", "online portal", "bank agent", "mobile app")
+DESCRIPTIONS = (
+    "monthly bill",
+    "arrears payment",
+    "reconnection fee",
+    "deposit",
+    "meter installation",
+    "late payment",
+)
+
+BENCH_PASSWORD = "bench-password"
+BENCH_END_DATE = date(2025, 12, 31)
+
+CUSTOMER_COLUMNS = (
+    "fname",
+    "lname",
+    "address",
+    "email",
+    "tel_num",
+    "mobile_num",
+    "service_type",
+    "comments",
+)
+TRANSACTION_COLUMNS = (
+    "receipt_num",
+    "date_entered",
+    "account_id",
+    "customer_name",
+    "description",
+    "amount",
+    "payment_type",
+    "utility",
+    "service_charge",
+    "balance_due",
+    "processor",
+    "user_id",
+)
+USER_COLUMNS = ("user_name", "fname", "lname", "password", "role")
+
+
+def bench_user_name(number: int) -> str:
+    return f"bench{number:03d}"
+
+
+def first_day(days: int) -> date:
+    return BENCH_END_DATE - timedelta(days=days - 1)
+
+
+def customers(rng: random.Random, count: int) -> Iterator[Tuple]:
+    for account_id in range(1, count + 1):
+        fname = rng.choice(FIRST_NAMES)
+        lname = rng.choice(LAST_NAMES)
+        yield (
+            fname,
+            lname,
+            f"{rng.randint(1, 999)} {rng.choice(STREETS)} Road",
+            f"{fname[0].lower()}{lname[:8].lower()}{account_id}@ex.test",
+            f"876{rng.randint(1000000, 9999999)}",
+            f"876{rng.randint(1000000, 9999999)}",
+            rng.choice(SERVICE_TYPES),
+            "",
+        )
+
+
+def transactions(
+    rng: random.Random,
+    count: int,
+    names: Sequence[str],
+    users: int,
+    days: int,
+) -> Iterator[Tuple]:
+    # Entered in date order, as in production, so ids and dates correlate.
+    start = first_day(days)
+    for number in range(count):
+        account_id = rng.randint(1, len(names))
+        amount = rng.randint(500, 50000)
+        yield (
+            f"R{number + 1:09d}",
+            start + timedelta(days=number * days // count),
+            account_id,
+            names[account_id - 1],
+            rng.choice(DESCRIPTIONS),
+            amount,
+            rng.choice(PAYMENT_TYPES),
+            rng.choice(UTILITIES),
+            rng.choice((0, 0, 100, 250)),
+            rng.randint(0, amount),
+            rng.choice(PROCESSORS),
+            rng.randint(1, users),
+        )
+
+
+def _copy(
+    cursor, table: str, columns: Sequence[str], rows: Iterator[Tuple], batch: int
+):
+    # Values are generated without tabs, newlines or backslashes, so COPY's
+    # text format needs no escaping.
+    statement = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+    while True:
+        buffer = io.StringIO()
+        written = 0
+        for row in rows:
+            buffer.write("\t".join(map(str, row)))
+            buffer.write("\n")
+            written += 1
+            if written == batch:
+                break
+        if not written:
+            return
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+
+
+def seed(
+    customer_count: int,
+    transaction_count: int,
+    user_count: int,
+    days: int,
+    random_seed: int,
+    batch: int,
+    echo: Callable[[str], None] = print,
+) -> None:
+    """Replace every customer, user and transaction with generated data.
+
+    The same arguments always produce the same rows, ids included. Creates
+    the monthly partitions the data needs and loads it with COPY, then
+    rebuilds the daily totals and customer balances the flush hooks would
+    otherwise have maintained, and analyzes the tables.
+    """
+    rng = random.Random(random_seed)
+    rounds = db.get_app().config["BCRYPT_ROUNDS"]
+    password = bcrypt.hashpw(BENCH_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds))
+
+    with db.engine.begin() as conn:
+        create_partitions(conn, first_day(days), BENCH_END_DATE)
+
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(
+            "TRUNCATE transactions, transaction_daily_totals, customers, users "
+            "RESTART IDENTITY CASCADE"
+        )
+
+        users: List[Tuple] = [
+            (
+                bench_user_name(number),
+                rng.choice(FIRST_NAMES),
+                rng.choice(LAST_NAMES),
+                password.decode("ascii"),
+                "Admin" if number == 1 else "Standard",
+            )
+            for number in range(1, user_count + 1)
+        ]
+        _copy(cursor, "users", USER_COLUMNS, iter(users), batch)
+        echo(f"Loaded {user_count} users")
+
+        generated = list(customers(rng, customer_count))
+        _copy(cursor, "customers", CUSTOMER_COLUMNS, iter(generated), batch)
+        names = [f"{row[0]} {row[1]}" for row in generated]
+        echo(f"Loaded {customer_count} customers")
+
+        _copy(
+            cursor,
+            "transactions",
+            TRANSACTION_COLUMNS,
+            transactions(rng, transaction_count, names, user_count, days),
+            batch,
+        )
+        echo(f"Loaded {transaction_count} transactions")
+
+        connection.commit()
+    finally:
+        connection.close()
+
+    TransactionModel.rebuild_daily_totals()
+    TransactionModel.rebuild_balances()
+    with db.engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("ANALYZE"))
+    echo("Rebuilt the daily totals and balances")
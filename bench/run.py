@@ -0,0 +1,319 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http.client import HTTPConnection
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+from bench.data import (
+    BENCH_PASSWORD,
+    DESCRIPTIONS,
+    FIRST_NAMES,
+    LAST_NAMES,
+    PAYMENT_TYPES,
+    PROCESSORS,
+    UTILITIES,
+    bench_user_name,
+)
+
+METRIC_LINE = re.compile(
+    r'^sql_statements_per_request_(sum|count)\{endpoint="([^"]+)"\} (\S+)$'
+)
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    body: Optional[Dict] = None
+
+
+class Scenario(NamedTuple):
+    """One benchmarked call; `endpoint` is the Flask endpoint it hits."""
+
+    endpoint: str
+    make: Callable[[random.Random, Dict], Request]
+
+
+def _transaction(rng: random.Random, sizes: Dict) -> Dict:
+    account_id = rng.randint(1, sizes["customers"])
+    amount = rng.randint(500, 50000)
+    return {
+        "receipt_num": f"B{rng.randint(1, 10 ** 9):09d}",
+        "account_id": account_id,
+        "customer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+        "description": rng.choice(DESCRIPTIONS),
+        "amount": amount,
+        "payment_type": rng.choice(PAYMENT_TYPES),
+        "utility": rng.choice(UTILITIES),
+        "service_charge": 0,
+        "balance_due": rng.randint(0, amount),
+        "processor": rng.choice(PROCESSORS),
+        "user_id": rng.randint(1, sizes["users"]),
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": Scenario(
+        "userlogin",
+        lambda rng, sizes: Request(
+            "POST",
+            "/login",
+            {
+                "user_name": bench_user_name(rng.randint(1, sizes["users"])),
+                "password": BENCH_PASSWORD,
+            },
+        ),
+    ),
+    "customer_list": Scenario(
+        "allcustomers", lambda rng, sizes: Request("GET", "/customers?limit=50")
+    ),
+    "customer_detail": Scenario(
+        "customer",
+        lambda rng, sizes: Request(
+            "GET", f"/customer/{rng.randint(1, sizes['customers'])}"
+        ),
+    ),
+    "customer_search": Scenario(
+        "customersearch",
+        lambda rng, sizes: Request(
+            "GET", f"/customers/search/{quote(rng.choice(LAST_NAMES))}"
+        ),
+    ),
+    "customer_statement": Scenario(
+        "customerstatement",
+        lambda rng, sizes: Request(
+            "GET", f"/customer/{rng.randint(1, sizes['customers'])}/statement"
+        ),
+    ),
+    "transaction_list": Scenario(
+        "transactionlist", lambda rng, sizes: Request("GET", "/transactions?limit=50")
+    ),
+    "transaction_list_filtered": Scenario(
+        "transactionlist",
+        lambda rng, sizes: Request(
+            "GET",
+            f"/transactions?limit=50&utility={rng.choice(UTILITIES)}"
+            f"&payment_type={rng.choice(PAYMENT_TYPES)}",
+        ),
+    ),
+    "transaction_detail": Scenario(
+        "transaction",
+        lambda rng, sizes: Request(
+            "GET", f"/transaction/{rng.randint(1, sizes['transactions'])}"
+        ),
+    ),
+    "transaction_search": Scenario(
+        "transactionsearch",
+        lambda rng, sizes: Request(
+            "GET", f"/transactions/search/{quote(rng.choice(LAST_NAMES))}"
+        ),
+    ),
+    "unified_search": Scenario(
+        "unifiedsearch",
+        lambda rng, sizes: Request("GET", f"/search?q={quote(rng.choice(LAST_NAMES))}"),
+    ),
+    "report": Scenario(
+        "transactiontotals",
+        lambda rng, sizes: Request("GET", "/reports/transactions?group_by=utility"),
+    ),
+    "transaction_create": Scenario(
+        "newtransaction",
+        lambda rng, sizes: Request(
+            "POST", "/transaction/new", _transaction(rng, sizes)
+        ),
+    ),
+    "transaction_update": Scenario(
+        "transaction",
+        lambda rng, sizes: Request(
+            "PATCH",
+            f"/transaction/{rng.randint(1, sizes['transactions'])}",
+            {"description": rng.choice(DESCRIPTIONS)},
+        ),
+    ),
+}
+
+
+def percentile(ordered: Sequence[float], share: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not ordered:
+        return None
+
+    rank = max(1, -(-len(ordered) * share // 1))
+    return ordered[int(rank) - 1]
+
+
+class Client:
+    """A keep-alive HTTP connection per thread, sending JSON."""
+
+    def __init__(self, url: str, token: Optional[str] = None):
+        parts = urlsplit(url)
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.headers = {"Content-Type": "application/json"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+        self._local = threading.local()
+
+    def _connection(self) -> HTTPConnection:
+        if not hasattr(self._local, "connection"):
+            self._local.connection = HTTPConnection(self.host, timeout=60)
+        return self._local.connection
+
+    def send(self, request: Request) -> Tuple[int, bytes]:
+        body = None if request.body is None else json.dumps(request.body)
+        # The server closes idle keep-alive connections, so a reused one may
+        # be gone; retry once on a fresh connection before giving up.
+        for attempt in range(2):
+            reused = hasattr(self._local, "connection")
+            connection = self._connection()
+            try:
+                connection.request(
+                    request.method, self.prefix + request.path, body, self.headers
+                )
+                response = connection.getresponse()
+                return response.status, response.read()
+            except OSError:
+                connection.close()
+                del self._local.connection
+                if not reused or attempt:
+                    raise
+
+
+def sql_counters(client: Client) -> Optional[Dict[str, List[float]]]:
+    """Per-endpoint [statements, requests] totals from the API's /metrics."""
+    try:
+        status, body = client.send(Request("GET", "/metrics"))
+    except OSError:
+        return None
+    if status != 200:
+        return None
+
+    counters: Dict[str, List[float]] = {}
+    for line in body.decode("utf-8").splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            kind, endpoint, value = match.groups()
+            totals = counters.setdefault(endpoint, [0.0, 0.0])
+            totals[0 if kind == "sum" else 1] += float(value)
+
+    return counters
+
+
+def run_scenario(
+    client: Client,
+    scenario: Scenario,
+    sizes: Dict,
+    concurrency: int,
+    duration: float,
+    random_seed: str,
+) -> Dict:
+    """Drive one scenario from `concurrency` threads for `duration` seconds."""
+    before = sql_counters(client)
+    deadline = time.perf_counter() + duration
+
+    def worker(number: int) -> Tuple[List[float], Counter]:
+        rng = random.Random(f"{random_seed}-{number}")
+        latencies, statuses = [], Counter()
+        while time.perf_counter() < deadline:
+            request = scenario.make(rng, sizes)
+            start = time.perf_counter()
+            try:
+                status, _ = client.send(request)
+            except OSError:
+                status = 0
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+        return latencies, statuses
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result, _ in results for latency in result)
+    statuses = sum((counts for _, counts in results), Counter())
+    after = sql_counters(client)
+
+    sql_per_request = None
+    if before is not None and after is not None:
+        statements, requests = (
+            now - then
+            for now, then in zip(
+                after.get(scenario.endpoint, [0.0, 0.0]),
+                before.get(scenario.endpoint, [0.0, 0.0]),
+            )
+        )
+        if requests:
+            sql_per_request = round(statements / requests, 2)
+
+    return {
+        "endpoint": scenario.endpoint,
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status >= 400)
+        + statuses[0],
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+        "sql_per_request": sql_per_request,
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def login(url: str, user_name: str) -> str:
+    status, body = Client(url).send(
+        Request("POST", "/login", {"user_name": user_name, "password": BENCH_PASSWORD})
+    )
+    if status != 200:
+        raise RuntimeError(f"Login as {user_name} failed with {status}: {body!r}")
+
+    return json.loads(body)["access_token"]
+
+
+def run(
+    url: str,
+    names: Sequence[str],
+    sizes: Dict,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    random_seed: int,
+    echo: Callable[[str], None] = print,
+) -> Dict:
+    """Run each named scenario in turn and collect its latency, throughput and SQL."""
+    client = Client(url, login(url, bench_user_name(1)))
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "url": url,
+        "concurrency": concurrency,
+        "duration": duration,
+        "seed": random_seed,
+        "sizes": sizes,
+        "scenarios": {},
+    }
+    for name in names:
+        scenario = SCENARIOS[name]
+        if warmup:
+            run_scenario(
+                client, scenario, sizes, concurrency, warmup, f"{random_seed}-warmup"
+            )
+        result = run_scenario(
+            client, scenario, sizes, concurrency, duration, str(random_seed)
+        )
+        report["scenarios"][name] = result
+        echo(
+            f"{name}: {result['throughput']} req/s, p50 {result['p50_ms']} ms, "
+            f"p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+            f"{result['sql_per_request']} SQL/req, {result['errors']} errors"
+        )
+
+    return report
@@ -1 +1,102 @@
-BLOCKLIST = set()
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+from common.replicas import use_primary
+from models.token_blocklist_model import TokenBlocklistModel
+
+
+class BlocklistBackend(ABC):
+    """Shared store of revoked token ids.
+
+    Entries only need to outlive the token they revoke. A Redis-compatible
+    store implements this as `SET jti 1 EX <seconds until exp>` and
+    `EXISTS jti`.
+    """
+
+    @abstractmethod
+    def add(self, jti: str, expires_at: datetime) -> None:
+        ...
+
+    @abstractmethod
+    def contains(self, jti: str) -> bool:
+        ...
+
+
+class DatabaseBlocklist(BlocklistBackend):
+    """Postgres backed store; expired rows are purged whenever a token is added."""
+
+    def add(self, jti: str, expires_at: datetime) -> None:
+        TokenBlocklistModel.add(jti, expires_at)
+        TokenBlocklistModel.purge_expired()
+
+    def contains(self, jti: str) -> bool:
+        # Never from a replica, where a fresh logout may not have arrived yet.
+        with use_primary():
+            return TokenBlocklistModel.is_revoked(jti)
+
+
+class TTLCache:
+    """Small thread-safe map whose entries expire after a per-entry lifetime."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: Dict[str, Tuple[bool, float]] = {}
+        self._lock = Lock()
+
+    def get(self, key: str) -> Optional[bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bool, ttl: float) -> None:
+        # Until init_app sizes it the cache holds nothing.
+        if self.max_size <= 0:
+            return
+
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_size:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (value, time.monotonic() + ttl)
+
+
+class Blocklist:
+    """Revoked token check with an in-process cache in front of a shared backend.
+
+    Revocations are cached until the token itself expires. Tokens found not
+    to be revoked are cached for JWT_BLOCKLIST_CACHE_TTL seconds, which bounds
+    how long a logout in another worker can go unnoticed.
+    """
+
+    def __init__(self, backend: Optional[BlocklistBackend] = None):
+        self.backend = backend
+        self.negative_ttl = 0.0
+        self.cache = TTLCache(0)
+
+    def init_app(self, app, backend: Optional[BlocklistBackend] = None) -> None:
+        self.backend = backend or self.backend or DatabaseBlocklist()
+        self.negative_ttl = app.config["JWT_BLOCKLIST_CACHE_TTL"]
+        self.cache = TTLCache(app.config["JWT_BLOCKLIST_CACHE_SIZE"])
+
+    def add(self, jti: str, exp: int) -> None:
+        self.backend.add(jti, datetime.fromtimestamp(exp, timezone.utc))
+        self.cache.set(jti, True, exp - time.time())
+
+    def contains(self, jti: str, exp: int) -> bool:
+        revoked = self.cache.get(jti)
+        if revoked is None:
+            revoked = self.backend.contains(jti)
+            ttl = exp - time.time() if revoked else self.negative_ttl
+            self.cache.set(jti, revoked, ttl)
+
+        return revoked
+
+
+blocklist = Blocklist()
@@ -0,0 +1,120 @@
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Hashable, NamedTuple, Optional, Set, Tuple
+
+from flask import Response, request
+from werkzeug.http import quote_etag
+
+from common.encoding import encode
+from common.replicas import pinned_to_primary, replica_bind
+
+
+class CacheEntry(NamedTuple):
+    body: bytes
+    etag: str
+    expires: float
+
+
+def make_etag(body: bytes, version: Optional[int] = None) -> str:
+    digest = hashlib.sha1(body).hexdigest()[:16]
+    return digest if version is None else f"{version}-{digest}"
+
+
+class ResponseCache:
+    """In-process LRU of JSON-encoded responses with a time-to-live.
+
+    Detail responses are keyed `(namespace, id)` and list responses
+    `(namespace, "list", query_string)`. Writes made through the models
+    invalidate the affected keys in this worker; other workers may serve
+    the previous payload for up to RESPONSE_CACHE_TTL seconds. Payloads read
+    from a replica are kept no longer than REPLICA_MAX_LAG_SECONDS, and a
+    client pinned to the primary by its own recent write never reads from
+    the cache.
+    """
+
+    def __init__(self):
+        self.max_size = 0
+        self.ttl = 0.0
+        self.replica_ttl = 0.0
+        self._entries: "OrderedDict[Tuple, CacheEntry]" = OrderedDict()
+        self._lists: Dict[Hashable, Set[Tuple]] = {}
+        self._lock = Lock()
+
+    def init_app(self, app) -> None:
+        self.max_size = app.config["RESPONSE_CACHE_SIZE"]
+        self.ttl = app.config["RESPONSE_CACHE_TTL"]
+        self.replica_ttl = min(self.ttl, app.config["REPLICA_MAX_LAG_SECONDS"])
+
+    def get(self, key: Tuple) -> Optional[CacheEntry]:
+        if pinned_to_primary():
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(
+        self, key: Tuple, payload: dict, version: Optional[int] = None
+    ) -> CacheEntry:
+        # Encoded once here with orjson; hits are served as these bytes.
+        body = encode(payload)
+        # A replica may already be behind, so its reads don't add a full TTL.
+        ttl = self.ttl if replica_bind() is None else self.replica_ttl
+        entry = CacheEntry(body, make_etag(body, version), time.monotonic() + ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            if len(key) > 1 and key[1] == "list":
+                self._lists.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def invalidate(self, namespace: Hashable, *ids) -> None:
+        """Drop the detail entries for `ids` and every list in `namespace`."""
+        with self._lock:
+            for key in [(namespace, id_) for id_ in ids] + list(
+                self._lists.pop(namespace, ())
+            ):
+                self._remove(key)
+
+    def _remove(self, key: Tuple) -> None:
+        if self._entries.pop(key, None) is not None and key in self._lists.get(
+            key[0], ()
+        ):
+            self._lists[key[0]].discard(key)
+
+
+def _json_response(entry: CacheEntry) -> Response:
+    # A Response object is passed through as is by flask-apispec and
+    # Flask-RESTful, so the body isn't decoded and re-encoded on the way out.
+    return Response(
+        entry.body,
+        200,
+        {"ETag": quote_etag(entry.etag, weak=True)},
+        mimetype="application/json",
+    )
+
+
+def cached_response(entry: CacheEntry):
+    """Answer with the cached body, or a bare 304 if the client has it."""
+    if request.if_none_match.contains_weak(entry.etag):
+        return "", 304, {"ETag": quote_etag(entry.etag, weak=True)}
+
+    return _json_response(entry)
+
+
+response_cache = ResponseCache()
+
+
+def updated_response(key: Tuple, payload: dict, version: int):
+    """Cache a payload that was just written and answer with it and its ETag."""
+    return _json_response(response_cache.set(key, payload, version))
@@ -1,3 +1,25 @@
-from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
 
-db = SQLAlchemy()
\ No newline at end of file
+from common.replicas import replica_bind
+
+
+class RoutingSession(SignallingSession):
+    """Reads from a replica during read-only requests, see ReplicaRouter."""
+
+    def get_bind(self, mapper=None, clause=None):
+        # Anything flushed goes to the primary, whatever the request method.
+        if not self._flushing:
+            replica = replica_bind()
+            if replica is not None:
+                return replica
+
+        return super().get_bind(mapper, clause)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
@@ -0,0 +1,31 @@
+import csv
+import io
+import json
+from typing import Iterator
+
+from sqlalchemy.engine import Result
+
+
+def ndjson_stream(result: Result) -> Iterator[str]:
+    """Yield one JSON document per row, a fetched batch at a time."""
+    keys = list(result.keys())
+    for rows in result.partitions():
+        yield "".join(
+            json.dumps(dict(zip(keys, row)), default=str) + "\n" for row in rows
+        )
+
+
+def csv_stream(result: Result) -> Iterator[str]:
+    """Yield a CSV header followed by the rows, a fetched batch at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(result.keys())
+    for rows in result.partitions():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
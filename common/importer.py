@@ -0,0 +1,147 @@
+import csv
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+from flask import Flask
+from marshmallow import EXCLUDE, ValidationError
+from openpyxl import load_workbook
+
+from common.db import db
+from common.uploads import imports, import_filename
+from models.customer_model import CustomerModel
+from models.import_job_model import ImportJobModel
+from schemas.customer_schema import CustomerSchema
+
+customer_rows_schema = CustomerSchema(many=True, load_instance=False, unknown=EXCLUDE)
+
+# Text columns a file may leave blank, loaded as empty rather than missing.
+ROW_DEFAULTS = {"comments": ""}
+
+IMPORT_ABANDONED = "The import was interrupted by a restart."
+
+
+def read_csv(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8-sig") as handle:
+        for row in csv.DictReader(handle):
+            # Blank cells count as missing, like empty cells in a spreadsheet.
+            yield {key: value for key, value in row.items() if key and value}
+
+
+def read_xlsx(path: str) -> Iterator[Dict]:
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() for cell in next(rows, ())]
+        for row in rows:
+            # Spreadsheets hand phone numbers back as ints, the schema wants text.
+            yield {
+                key: str(value) for key, value in zip(header, row) if value is not None
+            }
+    finally:
+        workbook.close()
+
+
+READERS = {"csv": read_csv, "xlsx": read_xlsx}
+
+
+class CustomerImporter:
+    """Runs customer file imports on a small background thread pool.
+
+    Files are read lazily and handled IMPORT_CHUNK_SIZE rows at a time: each
+    chunk is validated against CustomerSchema, its valid rows inserted with a
+    single executemany, and the job's progress committed, so memory stays
+    bounded by the chunk size whatever the file size.
+    """
+
+    def __init__(self):
+        self.app: Optional[Flask] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    def init_app(self, app: Flask) -> None:
+        self.app = app
+        self.executor = ThreadPoolExecutor(
+            max_workers=app.config["IMPORT_WORKERS"], thread_name_prefix="import"
+        )
+
+    def fail_abandoned(self) -> None:
+        """Fail jobs left pending or running by a previous process.
+
+        Jobs only run on this process's executor, so at startup any job not
+        finished was lost with the process that ran it. Call once, before
+        serving requests.
+        """
+        with self.app.app_context():
+            for job in ImportJobModel.find_unfinished():
+                path = imports.path(import_filename(job.job_id, job.filename))
+                if os.path.exists(path):
+                    os.remove(path)
+
+                job.status = "failed"
+                job.errors = job.errors + [{"row": None, "errors": IMPORT_ABANDONED}]
+                job.finished_at = datetime.utcnow()
+                job.save_to_db()
+
+    def submit(self, job_id: int, path: str) -> None:
+        self.executor.submit(self._run, job_id, path)
+
+    def _run(self, job_id: int, path: str) -> None:
+        with self.app.app_context():
+            job = ImportJobModel.find_by_id(job_id)
+            job.status = "running"
+            job.save_to_db()
+
+            try:
+                self._import(job, path)
+                job.status = "done"
+            except Exception as err:
+                db.session.rollback()
+                job.status = "failed"
+                job.errors = job.errors + [{"row": None, "errors": str(err)}]
+            finally:
+                os.remove(path)
+
+            job.finished_at = datetime.utcnow()
+            job.save_to_db()
+
+    def _import(self, job: ImportJobModel, path: str) -> None:
+        config = self.app.config
+        reader = READERS[path.rsplit(".", 1)[-1].lower()](path)
+        first_row = 2  # Row 1 holds the column headings.
+
+        while True:
+            chunk = list(islice(reader, config["IMPORT_CHUNK_SIZE"]))
+            if not chunk:
+                break
+
+            rows, errors = self._validate([{**ROW_DEFAULTS, **row} for row in chunk])
+            if rows:
+                CustomerModel.bulk_insert(rows)
+
+            job.rows_processed += len(chunk)
+            job.rows_imported += len(rows)
+            room = config["IMPORT_MAX_ERRORS"] - len(job.errors)
+            if errors and room > 0:
+                job.errors = job.errors + [
+                    {"row": first_row + index, "errors": messages}
+                    for index, messages in sorted(errors.items())[:room]
+                ]
+            job.save_to_db()
+            first_row += len(chunk)
+
+    @staticmethod
+    def _validate(chunk: List[Dict]):
+        try:
+            return customer_rows_schema.load(chunk), {}
+        except ValidationError as err:
+            rows = [
+                row
+                for index, row in enumerate(err.valid_data)
+                if index not in err.messages
+            ]
+            return rows, err.messages
+
+
+customer_importer = CustomerImporter()
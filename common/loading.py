@@ -0,0 +1,29 @@
+from typing import List, Sequence
+
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def related_ids(model, relations: Sequence[str]) -> List:
+    """Loader options fetching only the primary keys of the named relationships.
+
+    The schemas dump relationships as primary keys, so there is no need to
+    load the related rows in full, let alone lazily one SELECT per parent.
+    Collections are fetched with a single SELECT ... IN per relationship and
+    many-to-one references are joined into the parent query.
+    """
+    options = []
+    for name in relations:
+        attribute = getattr(model, name)
+        mapper = attribute.property.mapper
+        pk_names = [
+            mapper.get_property_by_column(col).key for col in mapper.primary_key
+        ]
+
+        if attribute.property.uselist:
+            loader = selectinload(attribute)
+        else:
+            loader = joinedload(attribute, innerjoin=True)
+
+        options.append(loader.load_only(*pk_names))
+
+    return options
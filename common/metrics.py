@@ -0,0 +1,135 @@
+import os
+import time
+
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by resource, method and status.",
+    ("endpoint", "method", "status"),
+)
+SQL_STATEMENTS = Histogram(
+    "sql_statements_per_request",
+    "SQL statements executed per request.",
+    ("endpoint",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+SQL_TIME = Histogram(
+    "sql_seconds_per_request",
+    "Time spent executing SQL per request.",
+    ("endpoint",),
+)
+SERIALIZATION_TIME = Histogram(
+    "serialization_seconds",
+    "Time spent dumping response data and encoding it as JSON.",
+    ("stage", "schema"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a pooled database connection.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+PASSWORD_HASH_TIME = Histogram(
+    "password_hash_seconds",
+    "bcrypt time by operation.",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8),
+)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+
+
+class TimedDumpMixin:
+    """Schema mixin recording the time spent in `dump`."""
+
+    def dump(self, obj, *, many=None):
+        start = time.perf_counter()
+        try:
+            return super().dump(obj, many=many)
+        finally:
+            SERIALIZATION_TIME.labels("dump", type(self).__name__).observe(
+                time.perf_counter() - start
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.sql_statements = g.get("sql_statements", 0) + 1
+        g.sql_seconds = (
+            g.get("sql_seconds", 0.0) + time.perf_counter() - context._metrics_start
+        )
+
+
+def _start_request() -> None:
+    g.request_start = time.perf_counter()
+
+
+def _observe_request(response: Response) -> Response:
+    endpoint = request.endpoint or "unmatched"
+    REQUEST_LATENCY.labels(endpoint, request.method, response.status_code).observe(
+        time.perf_counter() - g.request_start
+    )
+    SQL_STATEMENTS.labels(endpoint).observe(g.get("sql_statements", 0))
+    SQL_TIME.labels(endpoint).observe(g.get("sql_seconds", 0.0))
+    return response
+
+
+def metrics_view() -> Response:
+    # Under gunicorn every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    # and any of them can answer the scrape for all.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+
+class Metrics:
+    """Prometheus instrumentation for requests, SQL, the pool and /metrics.
+
+    Call init_app before the first database access so the engine is built
+    with TimedQueuePool.
+    """
+
+    def init_app(self, app) -> None:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"].setdefault("poolclass", TimedQueuePool)
+        for name, listener in (
+            ("before_cursor_execute", _before_cursor_execute),
+            ("after_cursor_execute", _after_cursor_execute),
+        ):
+            if not event.contains(Engine, name, listener):
+                event.listen(Engine, name, listener)
+
+        app.before_request(_start_request)
+        app.after_request(_observe_request)
+        app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+metrics = Metrics()
@@ -0,0 +1,111 @@
+import importlib
+import pkgutil
+from types import ModuleType
+from typing import List, Optional, Tuple
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+import migrations
+from common.db import db
+
+# Any constant works, it only has to be the same for every process.
+MIGRATION_LOCK_KEY = 7261001
+
+CREATE_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+)
+"""
+
+
+def available_migrations() -> List[Tuple[int, str, ModuleType]]:
+    """Migration modules named `v<NNNN>_<name>.py`, in version order."""
+    found = []
+    for info in pkgutil.iter_modules(migrations.__path__):
+        if info.name.startswith("v") and info.name[1:5].isdigit():
+            module = importlib.import_module(f"migrations.{info.name}")
+            found.append((int(info.name[1:5]), info.name, module))
+
+    return sorted(found, key=lambda migration: migration[0])
+
+
+def latest_version() -> int:
+    return max((version for version, _, _ in available_migrations()), default=0)
+
+
+def current_version(connection) -> int:
+    if connection.scalar(text("SELECT to_regclass('schema_version')")) is None:
+        return 0
+
+    return connection.scalar(
+        text("SELECT coalesce(max(version), 0) FROM schema_version")
+    )
+
+
+def upgrade(engine, target: Optional[int] = None) -> List[str]:
+    """Apply pending migrations, each in its own transaction.
+
+    An advisory lock serialises concurrent runs, so two deploys racing each
+    other apply every migration exactly once.
+    """
+    with engine.begin() as connection:
+        connection.exec_driver_sql(CREATE_VERSION_TABLE)
+
+    applied = []
+    for version, name, module in available_migrations():
+        if target is not None and version > target:
+            break
+
+        with engine.begin() as connection:
+            connection.execute(
+                text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY}
+            )
+            if version <= current_version(connection):
+                continue
+
+            module.upgrade(connection)
+            connection.execute(
+                text("INSERT INTO schema_version (version, name) VALUES (:v, :n)"),
+                {"v": version, "n": name},
+            )
+        applied.append(name)
+
+    return applied
+
+
+def check_schema_version(app) -> None:
+    """Refuse to start against a database the migrations haven't caught up with."""
+    with app.app_context(), db.engine.connect() as connection:
+        current, expected = current_version(connection), latest_version()
+
+    if current != expected:
+        raise RuntimeError(
+            "Database schema is at version {}, this release expects {}. "
+            "Run `flask db upgrade`.".format(current, expected)
+        )
+
+
+db_cli = AppGroup("db", help="Manage the database schema.")
+
+
+@db_cli.command("upgrade")
+@click.option("--target", type=int, help="Stop after this migration version.")
+def upgrade_command(target: Optional[int]) -> None:
+    """Apply pending schema migrations."""
+    applied = upgrade(db.engine, target)
+    for name in applied:
+        click.echo(f"Applied {name}")
+    if not applied:
+        click.echo("Schema is up to date.")
+
+
+@db_cli.command("current")
+def current_command() -> None:
+    """Show the applied and latest schema versions."""
+    with db.engine.connect() as connection:
+        click.echo(f"Current: {current_version(connection)}")
+    click.echo(f"Latest: {latest_version()}")
@@ -0,0 +1,65 @@
+import base64
+import json
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from flask import current_app, request
+from marshmallow import ValidationError
+
+from schemas.query_schema import page_args_schema
+
+INVALID_CURSOR = "Invalid pagination cursor."
+
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def cursor_offset(value) -> int:
+    """Cursor key type for offset paging, which only counts forwards."""
+    value = int(value)
+    if value < 0:
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable]) -> List:
+    """Decode an opaque cursor, converting each key with the matching type."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return [convert(value) for convert, value in zip(types, values)]
+    except (ValueError, TypeError):
+        raise ValidationError({"cursor": [INVALID_CURSOR]})
+
+
+def page_args(
+    types: Sequence[Callable], args: Optional[dict] = None
+) -> Tuple[int, Optional[List]]:
+    """Read `limit` and `cursor` from the query string.
+
+    The limit falls back to PAGINATION_DEFAULT_LIMIT and is clamped to
+    PAGINATION_MAX_LIMIT so a client can never request an unbounded page.
+    """
+    if args is None:
+        args = page_args_schema.load(request.args, unknown="exclude")
+
+    limit = min(
+        args.get("limit", current_app.config["PAGINATION_DEFAULT_LIMIT"]),
+        current_app.config["PAGINATION_MAX_LIMIT"],
+    )
+    cursor = args.get("cursor")
+    after = decode_cursor(cursor, types) if cursor else None
+
+    return limit, after
+
+
+def split_page(rows: List, limit: int, key: Callable) -> Tuple[List, Optional[str]]:
+    """Trim a `limit + 1` row fetch to one page and build the next cursor."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(key(rows[-1]))
+
+    return rows, None
@@ -0,0 +1,216 @@
+from datetime import date
+from typing import List, Optional, Tuple
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import text
+
+from common.db import db
+from models.daily_total_model import DailyTotalModel
+from models.transaction_model import TransactionModel
+
+# Any constant works, it only has to be the same for every process.
+PARTITION_LOCK_KEY = 7261002
+ARCHIVE_SCHEMA = "archive"
+DEFAULT_PARTITION = "transactions_default"
+
+
+def month_start(day: date, months: int = 0) -> date:
+    """First day of the month `months` after the one `day` falls in."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"transactions_y{month.year:04d}m{month.month:02d}"
+
+
+def _insert_columns() -> str:
+    return ", ".join(
+        column.name
+        for column in TransactionModel.__table__.columns
+        if column.computed is None
+    )
+
+
+def create_partition(connection, month: date) -> bool:
+    """Create the partition for `month` unless it already exists.
+
+    Rows for that month that landed in the default partition meanwhile are
+    moved into the new one, in the same transaction.
+    """
+    name = partition_name(month)
+    if connection.scalar(text("SELECT to_regclass(:name)"), {"name": name}):
+        return False
+
+    start, end = month, month_start(month, 1)
+    bounds = {"start": start, "end": end}
+    columns = _insert_columns()
+    stranded = connection.scalar(
+        text(
+            f"SELECT count(*) FROM {DEFAULT_PARTITION} "
+            "WHERE date_entered >= :start AND date_entered < :end"
+        ),
+        bounds,
+    )
+    if stranded:
+        connection.execute(
+            text(
+                "CREATE TEMPORARY TABLE stranded_transactions ON COMMIT DROP AS "
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+                "WHERE date_entered >= :start AND date_entered < :end "
+                f"RETURNING {columns}) SELECT * FROM moved"
+            ),
+            bounds,
+        )
+
+    # Bounds are dates we formatted ourselves; DDL takes no bind parameters.
+    connection.exec_driver_sql(
+        f"CREATE TABLE {name} PARTITION OF transactions "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    if stranded:
+        connection.exec_driver_sql(
+            f"INSERT INTO transactions ({columns}) "
+            f"SELECT {columns} FROM stranded_transactions"
+        )
+        # ON COMMIT DROP only fires at the end of the transaction, and the
+        # next month's partition may need the name again before then.
+        connection.exec_driver_sql("DROP TABLE stranded_transactions")
+
+    return True
+
+
+def create_partitions(connection, first: date, last: date) -> List[str]:
+    """Make sure every month from `first` to `last` has its own partition."""
+    connection.execute(
+        text("SELECT pg_advisory_xact_lock(:key)"), {"key": PARTITION_LOCK_KEY}
+    )
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if create_partition(connection, month):
+            created.append(partition_name(month))
+        month = month_start(month, 1)
+
+    return created
+
+
+def create_future_partitions(app) -> List[str]:
+    """Partitions from this month to PARTITION_MONTHS_AHEAD months ahead."""
+    today = date.today()
+    with app.app_context(), db.engine.begin() as connection:
+        return create_partitions(
+            connection,
+            today,
+            month_start(today, app.config["PARTITION_MONTHS_AHEAD"]),
+        )
+
+
+def attached_partitions(connection) -> List[Tuple[str, Optional[str], int]]:
+    """Name, bound expression and estimated row count of each partition."""
+    return connection.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid), "
+            "greatest(c.reltuples, 0)::bigint "
+            "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'transactions'::regclass ORDER BY c.relname"
+        )
+    ).all()
+
+
+partitions_cli = AppGroup(
+    "partitions", help="Manage the monthly transaction partitions."
+)
+
+
+@partitions_cli.command("create")
+@click.option(
+    "--months-ahead",
+    type=int,
+    help="Months past this one to cover. Defaults to PARTITION_MONTHS_AHEAD.",
+)
+@click.option(
+    "--start", type=click.DateTime(["%Y-%m-%d"]), help="First month to cover."
+)
+def create_command(months_ahead: Optional[int], start) -> None:
+    """Create missing monthly partitions; safe to run from cron."""
+    today = date.today()
+    if months_ahead is None:
+        months_ahead = current_app.config["PARTITION_MONTHS_AHEAD"]
+
+    with db.engine.begin() as connection:
+        created = create_partitions(
+            connection,
+            start.date() if start else today,
+            month_start(today, months_ahead),
+        )
+    for name in created:
+        click.echo(f"Created {name}")
+    if not created:
+        click.echo("All partitions exist.")
+
+
+@partitions_cli.command("list")
+def list_command() -> None:
+    """Show each partition with its bounds and estimated rows."""
+    with db.engine.connect() as connection:
+        for name, bounds, rows in attached_partitions(connection):
+            click.echo(f"{name}\t{bounds}\t~{rows} rows")
+
+
+@partitions_cli.command("archive")
+@click.argument("year", type=int)
+def archive_command(year: int) -> None:
+    """Detach a closed year's partitions into the archive schema.
+
+    Archived rows stay queryable as archive.transactions_y<YEAR>m<MM> but no
+    longer reach the API. The year's daily totals go with them, so reports
+    match the listing. Cached balances keep them, so don't rebuild those.
+    """
+    if year >= date.today().year:
+        raise click.ClickException(f"{year} is not a closed year.")
+
+    months = [partition_name(date(year, month, 1)) for month in range(1, 13)]
+    with db.engine.begin() as connection:
+        stranded = connection.scalar(
+            text(
+                f"SELECT count(*) FROM {DEFAULT_PARTITION} "
+                "WHERE date_entered >= :start AND date_entered < :end"
+            ),
+            {"start": date(year, 1, 1), "end": date(year + 1, 1, 1)},
+        )
+        if stranded:
+            raise click.ClickException(
+                f"{stranded} rows from {year} are in {DEFAULT_PARTITION}; "
+                f"run `flask partitions create --start {year}-01-01` first."
+            )
+
+        attached = {name for name, _, _ in attached_partitions(connection)}
+        connection.exec_driver_sql(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}")
+        archived = []
+        for name in months:
+            if name in attached:
+                connection.exec_driver_sql(
+                    f"ALTER TABLE transactions DETACH PARTITION {name}"
+                )
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"
+                )
+                archived.append(name)
+
+        # No row of the year is left in the table, so its totals all go.
+        dropped = connection.execute(
+            DailyTotalModel.__table__.delete().where(
+                DailyTotalModel.date_entered >= date(year, 1, 1),
+                DailyTotalModel.date_entered < date(year + 1, 1, 1),
+            )
+        ).rowcount
+
+    for name in archived:
+        click.echo(f"Archived {name} to {ARCHIVE_SCHEMA}.{name}")
+    if dropped:
+        click.echo(f"Removed {dropped} daily total rows for {year}.")
+    if not archived:
+        click.echo(f"No attached partitions for {year}.")
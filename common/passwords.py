@@ -0,0 +1,74 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from typing import Callable, Optional
+
+import bcrypt
+
+from common.metrics import PASSWORD_HASH_TIME
+
+
+def _timed(operation: str, func: Callable, *args):
+    with PASSWORD_HASH_TIME.labels(operation).time():
+        return func(*args)
+
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool and its queue are full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """bcrypt hashing on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL, so PASSWORD_HASH_WORKERS threads hash in
+    parallel while request threads only wait on the result. At most
+    PASSWORD_HASH_QUEUE_SIZE further requests may wait for a free thread;
+    beyond that callers get HashingBusy straight away instead of piling up
+    behind the pool and starving the rest of the API. The two together must
+    stay below the server's request threads, or every thread can end up
+    waiting on bcrypt before anyone is turned away.
+    """
+
+    def __init__(self):
+        self.rounds = 12
+        self.retry_after = 1
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.slots: Optional[BoundedSemaphore] = None
+
+    def init_app(self, app) -> None:
+        workers = app.config["PASSWORD_HASH_WORKERS"]
+        self.rounds = app.config["BCRYPT_ROUNDS"]
+        self.retry_after = app.config["PASSWORD_HASH_RETRY_AFTER"]
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self.slots = BoundedSemaphore(workers + app.config["PASSWORD_HASH_QUEUE_SIZE"])
+
+    def _run(self, operation: str, func: Callable, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        try:
+            return self.executor.submit(_timed, operation, func, *args).result()
+        finally:
+            self.slots.release()
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(
+            "hash", bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds)
+        )
+        return hashed.decode("ascii")
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(
+            "verify", bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8")
+        )
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True when `hashed` was made with a different cost than configured."""
+        return int(hashed.split("$")[2]) != self.rounds
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,105 @@
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+
+from flask import has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+MAX_PARAMETERS_LENGTH = 2000
+
+
+class SlowQueryLog:
+    """Opt-in record of statements slower than SLOW_QUERY_THRESHOLD_MS.
+
+    Each entry keeps the SQL, its parameters and the resource that ran it.
+    For a SLOW_QUERY_EXPLAIN_SAMPLE fraction of slow SELECTs the statement
+    is run again under EXPLAIN (ANALYZE, BUFFERS) on the same connection, so
+    the plan reflects the session that was slow. Entries live in a ring
+    buffer of SLOW_QUERY_BUFFER_SIZE, newest last.
+    """
+
+    def __init__(self):
+        self.threshold = 0.0
+        self.explain_sample = 0.0
+        self._entries: Deque[Dict] = deque(maxlen=1)
+        self._lock = Lock()
+
+    def init_app(self, app) -> None:
+        self.threshold = app.config["SLOW_QUERY_THRESHOLD_MS"] / 1000
+        self.explain_sample = app.config["SLOW_QUERY_EXPLAIN_SAMPLE"]
+        self._entries = deque(maxlen=app.config["SLOW_QUERY_BUFFER_SIZE"])
+
+        if app.config["SLOW_QUERY_ENABLED"]:
+            for name, listener in (
+                ("before_cursor_execute", self._before_cursor_execute),
+                ("after_cursor_execute", self._after_cursor_execute),
+            ):
+                if not event.contains(Engine, name, listener):
+                    event.listen(Engine, name, listener)
+
+    def entries(self) -> List[Dict]:
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        context._profiler_start = time.perf_counter()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        elapsed = time.perf_counter() - context._profiler_start
+        if elapsed < self.threshold:
+            return
+
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": repr(parameters)[:MAX_PARAMETERS_LENGTH],
+            "resource": None,
+            "plan": None,
+        }
+        if has_request_context():
+            entry["resource"] = f"{request.method} {request.endpoint} {request.path}"
+        if (
+            not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < self.explain_sample
+        ):
+            entry["plan"] = self._explain(conn, statement, parameters)
+
+        with self._lock:
+            self._entries.append(entry)
+
+    @staticmethod
+    def _explain(conn, statement, parameters) -> Optional[str]:
+        # A raw DBAPI cursor, so the EXPLAIN itself isn't timed and recorded,
+        # inside a savepoint so a failed EXPLAIN can't abort the transaction.
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute(
+                    "EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters or None
+                )
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            except Exception as err:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                return f"EXPLAIN failed: {err}"
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        finally:
+            cursor.close()
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,171 @@
+import itertools
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Optional
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+PRIMARY_COOKIE = "read_primary_until"
+READ_METHODS = ("GET", "HEAD")
+
+# Zero while the replica streams from the primary and has replayed all it
+# received, otherwise the age of the last transaction it replayed: a replica
+# cut off from the primary falls further behind every second. NULL, taken as
+# unusable, until it has replayed anything. Also zero on a server that isn't
+# replicating at all, such as a second stand-alone instance in development.
+REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN EXISTS (
+            SELECT FROM pg_stat_wal_receiver WHERE status = 'streaming'
+        ) AND pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """
+)
+
+
+class ReplicaRouter:
+    """Routes read-only requests to replicas of the primary database.
+
+    GET and HEAD requests read from one of SQLALCHEMY_REPLICA_URIS, picked
+    round-robin among the replicas less than REPLICA_MAX_LAG_SECONDS behind.
+    Each replica's lag is measured at most every REPLICA_LAG_CHECK_INTERVAL
+    seconds, by one thread while the others use the last measurement; an
+    unreachable or lagging replica is skipped until the next check, and with
+    none left reads fall back to the primary. A successful write sets a
+    cookie that keeps the client on the primary for REPLICA_STICKY_SECONDS,
+    so it reads its own writes.
+    """
+
+    def __init__(self):
+        self.uris: List[str] = []
+        self.engine_options: Dict = {}
+        self.max_lag = 5.0
+        self.check_interval = 1.0
+        self.sticky_seconds = 5
+        self._engines: Dict[str, Engine] = {}
+        self._lags: Dict[str, float] = {}
+        self._checked: Dict[str, float] = {}
+        self._turn = itertools.count()
+        self._lock = Lock()
+
+    def init_app(self, app) -> None:
+        self.uris = list(app.config["SQLALCHEMY_REPLICA_URIS"])
+        self.engine_options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        # Give up on an unreachable replica quickly, the primary can answer.
+        self.engine_options["connect_args"] = {
+            **self.engine_options.get("connect_args", {}),
+            "connect_timeout": app.config["REPLICA_CONNECT_TIMEOUT"],
+        }
+        self.max_lag = app.config["REPLICA_MAX_LAG_SECONDS"]
+        self.check_interval = app.config["REPLICA_LAG_CHECK_INTERVAL"]
+        self.sticky_seconds = app.config["REPLICA_STICKY_SECONDS"]
+
+        if self.uris:
+            app.before_request(_route_request)
+            app.after_request(self._stick_to_primary)
+
+    def _engine(self, uri: str) -> Engine:
+        # Built on first use, so each forked worker gets its own pools.
+        with self._lock:
+            if uri not in self._engines:
+                self._engines[uri] = create_engine(uri, **self.engine_options)
+            return self._engines[uri]
+
+    def lag(self, uri: str) -> float:
+        """Seconds `uri` is behind the primary, infinite if unreachable."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked.get(uri, float("-inf")) < self.check_interval:
+                # Unknown until the first check finishes.
+                return self._lags.get(uri, float("inf"))
+            self._checked[uri] = now
+
+        try:
+            with self._engine(uri).connect() as connection:
+                lag = connection.scalar(REPLICA_LAG)
+        except Exception:
+            lag = None
+        self._lags[uri] = float("inf") if lag is None else float(lag)
+        return self._lags[uri]
+
+    def engine(self) -> Optional[Engine]:
+        """A replica fresh enough to read from, None to use the primary."""
+        start = next(self._turn)
+        for i in range(len(self.uris)):
+            uri = self.uris[(start + i) % len(self.uris)]
+            if self.lag(uri) <= self.max_lag:
+                return self._engine(uri)
+
+        return None
+
+    def dispose(self) -> None:
+        """Drop pooled connections, such as those inherited by a fork."""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+
+    def _stick_to_primary(self, response: Response) -> Response:
+        if request.method not in READ_METHODS and response.status_code < 400:
+            until = time.time() + self.sticky_seconds
+            response.set_cookie(
+                PRIMARY_COOKIE,
+                str(int(until)),
+                max_age=self.sticky_seconds,
+                httponly=True,
+            )
+        return response
+
+
+def _route_request() -> None:
+    # Reset every time: requests inside one pushed app context, as in the
+    # tests, share a single g.
+    g.pop("replica_engine", None)
+    g.pinned_to_primary = g.read_replica = False
+    if request.method not in READ_METHODS:
+        return
+
+    try:
+        sticky = float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        sticky = False
+    g.pinned_to_primary = sticky
+    g.read_replica = not sticky
+
+
+@contextmanager
+def use_primary() -> Iterator[None]:
+    """Run the block's queries on the primary, even in a read-only request."""
+    if not has_request_context():
+        yield
+        return
+
+    routed = g.get("read_replica", False)
+    g.read_replica = False
+    try:
+        yield
+    finally:
+        g.read_replica = routed
+
+
+def pinned_to_primary() -> bool:
+    """Whether a recent write keeps the current client on the primary."""
+    return has_request_context() and g.get("pinned_to_primary", False)
+
+
+def replica_bind() -> Optional[Engine]:
+    """The replica engine the current request reads from, if any."""
+    if not has_request_context() or not g.get("read_replica"):
+        return None
+
+    if "replica_engine" not in g:
+        g.replica_engine = replicas.engine()
+    return g.replica_engine
+
+
+replicas = ReplicaRouter()
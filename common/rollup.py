@@ -0,0 +1,31 @@
+from datetime import date
+from typing import Optional
+
+import click
+from flask.cli import AppGroup
+
+from models.transaction_model import TransactionModel
+
+rollup_cli = AppGroup(
+    "rollup", help="Maintain the daily transaction totals and customer balances."
+)
+
+
+@rollup_cli.command("rebuild")
+@click.option(
+    "--start", type=click.DateTime(["%Y-%m-%d"]), help="First day to rebuild."
+)
+@click.option("--end", type=click.DateTime(["%Y-%m-%d"]), help="Last day to rebuild.")
+def rebuild_command(start: Optional[date], end: Optional[date]) -> None:
+    """Recompute the daily totals from the transactions table."""
+    groups = TransactionModel.rebuild_daily_totals(
+        start and start.date(), end and end.date()
+    )
+    click.echo(f"Rebuilt {groups} daily groups")
+
+
+@rollup_cli.command("balances")
+def balances_command() -> None:
+    """Recompute the cached customer balances from the transactions table."""
+    customers = TransactionModel.rebuild_balances()
+    click.echo(f"Rebuilt the balances of {customers} customers")
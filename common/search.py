@@ -0,0 +1,135 @@
+import re
+from typing import List, Optional, Sequence
+
+from flask import current_app
+from marshmallow import ValidationError
+
+from common.db import db
+from common.loading import related_ids
+
+TERM_TOO_SHORT = "Search terms must be at least {} characters long."
+SINGLE_WORD = re.compile(r"\w+")
+
+
+def validate_term(term: str) -> str:
+    term = term.strip()
+    min_length = current_app.config["SEARCH_MIN_TERM_LENGTH"]
+    if len(term) < min_length:
+        raise ValidationError({"term": [TERM_TOO_SHORT.format(min_length)]})
+
+    return term
+
+
+def build_tsquery(term: str):
+    """Prefix match a single word, otherwise parse the term as a web search.
+
+    `websearch_to_tsquery` understands quoted phrases, `or` and `-word`, but
+    has no prefix syntax, so a lone word keeps the `word:*` behaviour.
+    """
+    if SINGLE_WORD.fullmatch(term):
+        return db.func.to_tsquery("english", f"{term}:*")
+
+    return db.func.websearch_to_tsquery("english", term)
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fuzzy_search(
+    model,
+    columns: Sequence,
+    term: str,
+    limit: int,
+    offset: int = 0,
+    relations: Sequence[str] = (),
+    threshold: Optional[float] = None,
+    tiebreak: Sequence = (),
+) -> List:
+    """Return `(instance, None)` rows matching `term` by trigram similarity.
+
+    A row matches when any of `columns` is similar to the term above
+    `threshold` or contains it as a substring, both of which the columns'
+    `gin_trgm_ops` indexes serve. Rows are ordered by their best similarity.
+    """
+    if threshold is None:
+        threshold = current_app.config["SEARCH_FUZZY_THRESHOLD"]
+
+    pattern = "%{}%".format(escape_like(term))
+    score = db.func.greatest(*(db.func.similarity(column, term) for column in columns))
+
+    # The `%` operator reads its cut-off from this setting; `true` scopes it
+    # to the current transaction.
+    db.session.execute(
+        db.select(
+            db.func.set_config("pg_trgm.similarity_threshold", str(threshold), True)
+        )
+    )
+    return (
+        db.session.query(model, db.null())
+        .options(*related_ids(model, relations))
+        .filter(
+            db.or_(
+                *(column.op("%")(term) for column in columns),
+                *(column.ilike(pattern) for column in columns),
+            )
+        )
+        .order_by(db.desc(score), *tiebreak)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def ranked_search(
+    model,
+    document,
+    term: str,
+    limit: int,
+    offset: int = 0,
+    relations: Sequence[str] = (),
+    highlight: bool = False,
+    tiebreak: Sequence = (),
+) -> List:
+    """Return `(instance, headline)` rows ordered by `ts_rank_cd`.
+
+    `document` is the text the model's `__ts_vector__` is built from; it is
+    only read to build `ts_headline` snippets when `highlight` is set.
+    """
+    query = build_tsquery(term)
+    rank = db.func.ts_rank_cd(model.__ts_vector__, query)
+    headline = (
+        db.func.ts_headline("english", document, query) if highlight else db.null()
+    )
+
+    return (
+        db.session.query(model, headline)
+        .options(*related_ids(model, relations))
+        .filter(model.__ts_vector__.op("@@")(query))
+        .order_by(db.desc(rank), *tiebreak)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def dump_hits(schema, rows: List, highlight: bool) -> List[dict]:
+    """Dump `ranked_search` rows, attaching each snippet as `headline`."""
+    hits = schema.dump([row[0] for row in rows])
+    if highlight:
+        for hit, row in zip(hits, rows):
+            hit["headline"] = row[1]
+
+    return hits
+
+
+def unified_search(term: str, limit: int, models: Sequence) -> List:
+    """Search several models in one round-trip.
+
+    Each model contributes its own top `limit` hits, ranked independently,
+    and the per-model selects are combined with UNION ALL.
+    """
+    query = build_tsquery(term)
+    return db.session.execute(
+        db.union_all(*(model.search_hits(query, limit) for model in models))
+    ).all()
@@ -0,0 +1,31 @@
+from typing import Dict, List, Optional, Sequence
+
+from marshmallow import ValidationError
+
+UNKNOWN_FIELDS = "Unknown field(s): {}."
+
+
+def requested_fields(
+    available: Sequence[str], only: Optional[Sequence[str]]
+) -> List[str]:
+    """Names to dump for a `fields=` selection, in the order asked for.
+
+    Without a selection every available name is dumped, alphabetically.
+    """
+    if not only:
+        return sorted(available)
+
+    unknown = set(only) - set(available)
+    if unknown:
+        raise ValidationError(
+            {"fields": [UNKNOWN_FIELDS.format(", ".join(sorted(unknown)))]}
+        )
+
+    return list(dict.fromkeys(only))
+
+
+def columnar(
+    names: Sequence[str], rows: List[List], next_cursor: Optional[str]
+) -> Dict:
+    """A page as column names plus one array of values per item."""
+    return {"columns": list(names), "rows": rows, "next": next_cursor}
@@ -0,0 +1,8 @@
+from flask_uploads import UploadSet, extension
+
+imports = UploadSet("imports", ("csv", "xlsx"))
+
+
+def import_filename(job_id: int, filename: str) -> str:
+    """Name an import job's upload is stored under, found again from the job."""
+    return "{}.{}".format(job_id, extension(filename).lower())
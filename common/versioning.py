@@ -0,0 +1,53 @@
+from typing import Dict, Optional, Sequence, Set
+
+from flask import request
+from sqlalchemy.engine import Row
+
+from common.db import db
+
+PRECONDITION_FAILED = "The record was changed by someone else; fetch it and retry."
+
+
+def if_match_versions() -> Optional[Set[int]]:
+    """Row versions named by the If-Match header, None if any version will do.
+
+    Detail ETags are `<version>-<digest>`, weak or not, so only the version
+    prefix is compared. A header naming no usable version matches nothing.
+    """
+    if not request.if_match or request.if_match.star_tag:
+        return None
+
+    versions = set()
+    for etag in request.if_match.as_set(include_weak=True):
+        version, _, _ = etag.partition("-")
+        if version.isdigit():
+            versions.add(int(version))
+
+    return versions
+
+
+def versioned_update(
+    model,
+    key,
+    values: Dict,
+    versions: Optional[Set[int]],
+    returning: Sequence,
+    *where,
+) -> Optional[Row]:
+    """UPDATE one row by primary key and bump its version, in one statement.
+
+    With `versions` the row is only touched if its version is one of them.
+    Returns the `returning` columns of the updated row, or None if no row
+    matched. The caller commits.
+    """
+    table = model.__table__
+    stmt = (
+        table.update()
+        .where(table.c[model.__mapper__.primary_key[0].key] == key, *where)
+        .values(**values, version=table.c.version + 1)
+        .returning(*returning)
+    )
+    if versions is not None:
+        stmt = stmt.where(table.c.version.in_(versions))
+
+    return db.session.execute(stmt).first()
@@ -12,3 +12,8 @@ DEBUG = False
 SQLALCHEMY_DATABASE_URI = (
     f"postgresql://{user_name}:{password}@{host}:{port}/{database}"
 )
+SQLALCHEMY_REPLICA_URIS = [
+    f"postgresql://{user_name}:{password}@{replica.strip()}/{database}"
+    for replica in (fetcher.get("REPLICA_HOSTS") or "").split(",")
+    if replica.strip()
+]
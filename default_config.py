@@ -16,12 +16,59 @@ DEBUG = True  # Set false in produciton environment
 SQLALCHEMY_DATABASE_URI = (
     f"postgresql://{user_name}:{password}@{host}:{port}/{database}"
 )
+# Optional read replicas: REPLICA_HOSTS=host:port,host:port, same credentials.
+SQLALCHEMY_REPLICA_URIS = [
+    f"postgresql://{user_name}:{password}@{replica.strip()}/{database}"
+    for replica in (params.get("REPLICA_HOSTS") or "").split(",")
+    if replica.strip()
+]
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+# Per worker process: see "Connection budget" in the README.
+SQLALCHEMY_ENGINE_OPTIONS = {
+    "pool_size": int(params.get("DB_POOL_SIZE") or 5),
+    "max_overflow": int(params.get("DB_MAX_OVERFLOW") or 2),
+    "pool_timeout": int(params.get("DB_POOL_TIMEOUT") or 10),
+    "pool_recycle": int(params.get("DB_POOL_RECYCLE") or 1800),
+    "pool_pre_ping": True,
+    "connect_args": {
+        "options": "-c statement_timeout={}".format(
+            params.get("DB_STATEMENT_TIMEOUT_MS") or 30000
+        )
+    },
+}
 PROPAGATE_EXCEPTIONS = True
 JWT_SECRET_KEY = params.get("JWT_SECRET_KEY")
 APP_SECRET_KEY = params.get("APP_SECRET_KEY")
+PAGINATION_DEFAULT_LIMIT = 50
+PAGINATION_MAX_LIMIT = 500
+SEARCH_MIN_TERM_LENGTH = 3
+SEARCH_FUZZY_THRESHOLD = 0.3
+UNIFIED_SEARCH_LIMIT = 10  # Hits returned per entity type
+EXPORT_BATCH_SIZE = 2000
+BULK_MAX_ROWS = 50000
+RESPONSE_CACHE_SIZE = 10000
+RESPONSE_CACHE_TTL = 30  # Seconds another worker's writes may go unseen
+UPLOADED_IMPORTS_DEST = "uploads/imports"
+IMPORT_WORKERS = 2
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_MAX_ERRORS = 1000  # Row errors kept per import job
+BCRYPT_ROUNDS = 12  # Existing hashes are upgraded on the next login
+PASSWORD_HASH_WORKERS = 2
+PASSWORD_HASH_QUEUE_SIZE = 1  # Workers + queue must stay below the request threads
+PASSWORD_HASH_RETRY_AFTER = 1
+REPLICA_MAX_LAG_SECONDS = 5  # Lagging further, a replica is skipped
+REPLICA_LAG_CHECK_INTERVAL = 1
+REPLICA_CONNECT_TIMEOUT = 2  # Seconds, for replica connections only
+REPLICA_STICKY_SECONDS = 5  # Reads on the primary after a client's write
+PARTITION_MONTHS_AHEAD = 3  # Transaction partitions created ahead of time
+SLOW_QUERY_ENABLED = False
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_EXPLAIN_SAMPLE = 0.1  # Share of slow SELECTs re-run under EXPLAIN ANALYZE
+SLOW_QUERY_BUFFER_SIZE = 200
 JWT_BLOCKLIST_ENABLED = True
 JWT_BLOCKLIST_TOKEN_CHECKS = ["access", "refresh"]
+JWT_BLOCKLIST_CACHE_TTL = 5  # Seconds a worker may miss a logout made elsewhere
+JWT_BLOCKLIST_CACHE_SIZE = 10000
 APISPEC_SPEC = APISpec(
     title="Payment Tracking API",
     version="v1.2",
@@ -0,0 +1,44 @@
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+
+# Load the app once in the master so workers share its memory, and start
+# each worker with a fresh connection pool.
+preload_app = True
+
+
+def on_starting(server):
+    from wsgi import app
+
+    # Password hashing must leave each worker a thread for everything else.
+    admitted = (
+        app.config["PASSWORD_HASH_WORKERS"] + app.config["PASSWORD_HASH_QUEUE_SIZE"]
+    )
+    if admitted >= server.cfg.threads:
+        raise RuntimeError(
+            "PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE ({}) must be below "
+            "the {} threads per worker.".format(admitted, server.cfg.threads)
+        )
+
+
+def post_fork(server, worker):
+    from common.db import db
+    from common.replicas import replicas
+    from wsgi import app
+
+    with app.app_context():
+        db.engine.dispose()
+    replicas.dispose()
+
+
+def child_exit(server, worker):
+    # Let Prometheus' multiprocess mode clean up after a dead worker.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,62 @@
+# Baseline schema, as db.create_all() used to create it on the first request.
+# Everything is IF NOT EXISTS so databases created that way are adopted as is.
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS customers (
+        account_id SERIAL NOT NULL,
+        fname VARCHAR(65) NOT NULL,
+        lname VARCHAR(65) NOT NULL,
+        address VARCHAR(140) NOT NULL,
+        email VARCHAR(25) NOT NULL,
+        tel_num VARCHAR(15) NOT NULL,
+        mobile_num VARCHAR(15) NOT NULL,
+        service_type VARCHAR(22) NOT NULL,
+        comments VARCHAR(255) NOT NULL,
+        __ts_vector__ TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', fname || ' ' || lname || ' ' || address || ' ' || email || ' ' || service_type )) STORED,
+        PRIMARY KEY (account_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS customer_vector_idx ON customers USING gin (__ts_vector__)",
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        user_id SERIAL NOT NULL,
+        user_name VARCHAR(50) NOT NULL,
+        fname VARCHAR(65) NOT NULL,
+        lname VARCHAR(65) NOT NULL,
+        password VARCHAR(254) NOT NULL,
+        role VARCHAR(20) NOT NULL,
+        __ts_vector__ TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', user_name || ' ' || fname || ' ' || lname || ' ' || role )) STORED,
+        PRIMARY KEY (user_id),
+        UNIQUE (user_name)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS vector_idx ON users USING gin (__ts_vector__)",
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+        transaction_id SERIAL NOT NULL,
+        receipt_num VARCHAR(50) NOT NULL,
+        date_entered DATE NOT NULL,
+        account_id INTEGER NOT NULL,
+        customer_name VARCHAR(130) NOT NULL,
+        description VARCHAR(255) NOT NULL,
+        amount INTEGER NOT NULL,
+        payment_type VARCHAR(15) NOT NULL,
+        utility VARCHAR(15) NOT NULL,
+        service_charge INTEGER NOT NULL,
+        balance_due INTEGER NOT NULL,
+        processor VARCHAR(65) NOT NULL,
+        user_id INTEGER NOT NULL,
+        __ts_vector__ TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', receipt_num || ' ' || customer_name || ' ' || description || ' ' || utility || ' ' || processor )) STORED,
+        PRIMARY KEY (transaction_id),
+        FOREIGN KEY(account_id) REFERENCES customers (account_id),
+        FOREIGN KEY(user_id) REFERENCES users (user_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS trans_vector_idx ON transactions USING gin (__ts_vector__)",
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,44 @@
+# Pagination and trigram indexes, row versions, the token blocklist and
+# customer import jobs.
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS trans_date_id_idx ON transactions (date_entered, transaction_id)",
+    "CREATE INDEX IF NOT EXISTS customer_fname_trgm_idx ON customers USING gin (fname gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS customer_lname_trgm_idx ON customers USING gin (lname gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS customer_tel_trgm_idx ON customers USING gin (tel_num gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS customer_mobile_trgm_idx ON customers USING gin (mobile_num gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS trans_receipt_trgm_idx ON transactions USING gin (receipt_num gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS trans_customer_trgm_idx ON transactions USING gin (customer_name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS user_fname_trgm_idx ON users USING gin (fname gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS user_lname_trgm_idx ON users USING gin (lname gin_trgm_ops)",
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT '1' NOT NULL",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT '1' NOT NULL",
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS version INTEGER DEFAULT '1' NOT NULL",
+    """
+    CREATE TABLE IF NOT EXISTS token_blocklist (
+        jti VARCHAR(36) NOT NULL,
+        expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+        PRIMARY KEY (jti)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_token_blocklist_expires_at ON token_blocklist (expires_at)",
+    """
+    CREATE TABLE IF NOT EXISTS import_jobs (
+        job_id SERIAL NOT NULL,
+        filename VARCHAR(255) NOT NULL,
+        status VARCHAR(15) NOT NULL,
+        rows_processed INTEGER NOT NULL,
+        rows_imported INTEGER NOT NULL,
+        errors JSONB NOT NULL,
+        created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        finished_at TIMESTAMP WITHOUT TIME ZONE,
+        PRIMARY KEY (job_id)
+    )
+    """,
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
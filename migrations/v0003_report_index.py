@@ -0,0 +1,14 @@
+# Covering index for the transaction totals report: date range scans can be
+# answered from the index alone.
+
+STATEMENTS = [
+    """
+    CREATE INDEX IF NOT EXISTS trans_report_idx ON transactions (date_entered)
+    INCLUDE (utility, payment_type, processor, account_id, amount, service_charge, balance_due)
+    """,
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,30 @@
+# Daily transaction rollup, backfilled from the existing transactions.
+
+STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS transaction_daily_totals (
+        date_entered DATE NOT NULL,
+        utility VARCHAR(15) NOT NULL,
+        payment_type VARCHAR(15) NOT NULL,
+        processor VARCHAR(65) NOT NULL,
+        count BIGINT NOT NULL,
+        amount BIGINT NOT NULL,
+        service_charge BIGINT NOT NULL,
+        balance_due BIGINT NOT NULL,
+        PRIMARY KEY (date_entered, utility, payment_type, processor)
+    )
+    """,
+    """
+    INSERT INTO transaction_daily_totals
+    SELECT date_entered, utility, payment_type, processor,
+        count(*), sum(amount), sum(service_charge), sum(balance_due)
+    FROM transactions
+    GROUP BY date_entered, utility, payment_type, processor
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
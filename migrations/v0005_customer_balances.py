@@ -0,0 +1,19 @@
+# Cached customer balances and the per-customer statement index.
+
+STATEMENTS = [
+    "ALTER TABLE customers ADD COLUMN IF NOT EXISTS current_balance BIGINT DEFAULT '0' NOT NULL",
+    """
+    UPDATE customers SET current_balance = totals.balance
+    FROM (
+        SELECT account_id, sum(balance_due) AS balance
+        FROM transactions GROUP BY account_id
+    ) AS totals
+    WHERE customers.account_id = totals.account_id
+    """,
+    "CREATE INDEX IF NOT EXISTS trans_account_date_idx ON transactions (account_id, date_entered, transaction_id)",
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,15 @@
+# Composite indexes for the structured filters on the transaction listing.
+# Each one leads with the filtered column(s) and ends with the listing's sort
+# key, so a filtered page is a bounded backward index scan.
+
+STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS trans_user_date_idx ON transactions (user_id, date_entered, transaction_id)",
+    "CREATE INDEX IF NOT EXISTS trans_utility_payment_date_idx ON transactions (utility, payment_type, date_entered, transaction_id)",
+    "CREATE INDEX IF NOT EXISTS trans_payment_date_idx ON transactions (payment_type, date_entered, transaction_id)",
+    "CREATE INDEX IF NOT EXISTS trans_processor_date_idx ON transactions (processor, date_entered, transaction_id)",
+]
+
+
+def upgrade(connection) -> None:
+    for statement in STATEMENTS:
+        connection.exec_driver_sql(statement)
@@ -0,0 +1,117 @@
+# Range-partition transactions by month of date_entered.
+#
+# The table is rebuilt: the old heap is renamed aside, the partitioned table
+# created in its place with a partition per month from the oldest row to
+# three months ahead plus a default partition, the rows copied across and
+# the old heap dropped. Indexes are created on the parent after the copy, so
+# every partition gets its own. The primary key must include the partition
+# key, so it becomes (transaction_id, date_entered). Run it in a maintenance
+# window; it holds an exclusive lock on transactions throughout.
+
+from datetime import date
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "transaction_id, receipt_num, date_entered, account_id, customer_name, "
+    "description, amount, payment_type, utility, service_charge, balance_due, "
+    "processor, user_id, version"
+)
+
+OLD_INDEXES = (
+    "trans_vector_idx",
+    "trans_date_id_idx",
+    "trans_account_date_idx",
+    "trans_user_date_idx",
+    "trans_utility_payment_date_idx",
+    "trans_payment_date_idx",
+    "trans_processor_date_idx",
+    "trans_amount_idx",
+    "trans_report_idx",
+    "trans_receipt_trgm_idx",
+    "trans_customer_trgm_idx",
+)
+
+SET_ASIDE = [
+    "LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE",
+    "ALTER TABLE transactions RENAME TO transactions_unpartitioned",
+    "ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey",
+    *(f"DROP INDEX IF EXISTS {name}" for name in OLD_INDEXES),
+    """
+    CREATE TABLE transactions (
+        transaction_id INTEGER NOT NULL DEFAULT nextval('transactions_transaction_id_seq'),
+        receipt_num VARCHAR(50) NOT NULL,
+        date_entered DATE NOT NULL,
+        account_id INTEGER NOT NULL,
+        customer_name VARCHAR(130) NOT NULL,
+        description VARCHAR(255) NOT NULL,
+        amount INTEGER NOT NULL,
+        payment_type VARCHAR(15) NOT NULL,
+        utility VARCHAR(15) NOT NULL,
+        service_charge INTEGER NOT NULL,
+        balance_due INTEGER NOT NULL,
+        processor VARCHAR(65) NOT NULL,
+        user_id INTEGER NOT NULL,
+        version INTEGER DEFAULT '1' NOT NULL,
+        __ts_vector__ TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', receipt_num || ' ' || customer_name || ' ' || description || ' ' || utility || ' ' || processor )) STORED,
+        PRIMARY KEY (transaction_id, date_entered),
+        FOREIGN KEY(account_id) REFERENCES customers (account_id),
+        FOREIGN KEY(user_id) REFERENCES users (user_id)
+    ) PARTITION BY RANGE (date_entered)
+    """,
+    "ALTER SEQUENCE transactions_transaction_id_seq OWNED BY transactions.transaction_id",
+    "CREATE TABLE transactions_default PARTITION OF transactions DEFAULT",
+]
+
+COPY_ROWS = [
+    f"INSERT INTO transactions ({COLUMNS}) SELECT {COLUMNS} FROM transactions_unpartitioned",
+    "DROP TABLE transactions_unpartitioned",
+]
+
+INDEXES = [
+    "CREATE INDEX trans_vector_idx ON transactions USING gin (__ts_vector__)",
+    "CREATE INDEX trans_date_id_idx ON transactions (date_entered, transaction_id)",
+    "CREATE INDEX trans_account_date_idx ON transactions (account_id, date_entered, transaction_id)",
+    "CREATE INDEX trans_user_date_idx ON transactions (user_id, date_entered, transaction_id)",
+    "CREATE INDEX trans_utility_payment_date_idx ON transactions (utility, payment_type, date_entered, transaction_id)",
+    "CREATE INDEX trans_payment_date_idx ON transactions (payment_type, date_entered, transaction_id)",
+    "CREATE INDEX trans_processor_date_idx ON transactions (processor, date_entered, transaction_id)",
+    "CREATE INDEX trans_amount_idx ON transactions (amount)",
+    "CREATE INDEX trans_report_idx ON transactions (date_entered) INCLUDE (utility, payment_type, processor, account_id, amount, service_charge, balance_due)",
+    "CREATE INDEX trans_receipt_trgm_idx ON transactions USING gin (receipt_num gin_trgm_ops)",
+    "CREATE INDEX trans_customer_trgm_idx ON transactions USING gin (customer_name gin_trgm_ops)",
+    "ANALYZE transactions",
+]
+
+
+def _month(day: date, months: int = 0) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade(connection) -> None:
+    partitioned = connection.exec_driver_sql(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = 'transactions'::regclass"
+    ).scalar()
+    if partitioned:
+        return
+
+    for statement in SET_ASIDE:
+        connection.exec_driver_sql(statement)
+
+    oldest = connection.exec_driver_sql(
+        "SELECT min(date_entered) FROM transactions_unpartitioned"
+    ).scalar()
+    last = _month(date.today(), MONTHS_AHEAD)
+    month = _month(oldest or date.today())
+    while month <= last:
+        end = _month(month, 1)
+        connection.exec_driver_sql(
+            f"CREATE TABLE transactions_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF transactions "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+
+    for statement in COPY_ROWS + INDEXES:
+        connection.exec_driver_sql(statement)
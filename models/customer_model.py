@@ -1,7 +1,13 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from common.cache import response_cache
 from common.db import db
+from common.loading import related_ids
+from common.versioning import versioned_update
+from common.search import fuzzy_search, ranked_search
 from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
 from sqlalchemy.types import TypeDecorator
 
 
@@ -22,6 +28,8 @@ class CustomerModel(db.Model):
     mobile_num = db.Column(db.String(15), nullable=False)
     service_type = db.Column(db.String(22), nullable=False)
     comments = db.Column(db.String(255), nullable=False)
+    current_balance = db.Column(db.BigInteger, nullable=False, server_default="0")
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     __ts_vector__ = db.Column(
         TsVector(),
         db.Computed(
@@ -34,28 +42,190 @@ class CustomerModel(db.Model):
 
     __table_args__ = (
         db.Index("customer_vector_idx", __ts_vector__, postgresql_using="gin"),
+        db.Index(
+            "customer_fname_trgm_idx",
+            fname,
+            postgresql_using="gin",
+            postgresql_ops={"fname": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "customer_lname_trgm_idx",
+            lname,
+            postgresql_using="gin",
+            postgresql_ops={"lname": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "customer_tel_trgm_idx",
+            tel_num,
+            postgresql_using="gin",
+            postgresql_ops={"tel_num": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "customer_mobile_trgm_idx",
+            mobile_num,
+            postgresql_using="gin",
+            postgresql_ops={"mobile_num": "gin_trgm_ops"},
+        ),
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
+        self.invalidate_cache()
 
     def delete_from_db(self):
         db.session.delete(self)
         db.session.commit()
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        response_cache.invalidate("customers", self.account_id)
+
+    @classmethod
+    def apply_balance_deltas(cls, connection, deltas: Dict[int, int]) -> None:
+        """Add `balance_due` deltas to the cached balances, in the caller's transaction."""
+        rows = [
+            {"id": account_id, "delta": delta}
+            for account_id, delta in sorted(deltas.items())
+            if delta
+        ]
+        if rows:
+            connection.execute(
+                cls.__table__.update()
+                .where(cls.__table__.c.account_id == db.bindparam("id"))
+                .values(
+                    current_balance=cls.__table__.c.current_balance
+                    + db.bindparam("delta")
+                ),
+                rows,
+            )
+
+    @classmethod
+    def bulk_insert(cls, rows: List[Dict]) -> None:
+        """Insert already validated rows with one executemany and one commit."""
+        columns = cls.__table__.columns.keys()
+        db.session.execute(
+            cls.__table__.insert(),
+            [{key: row[key] for key in columns if key in row} for row in rows],
+        )
+        db.session.commit()
+        response_cache.invalidate("customers")
 
     @classmethod
-    def find_by_id(cls, account_id: int) -> CustomerModel:
-        return cls.query.filter_by(account_id=account_id).first()
+    def update_by_id(
+        cls,
+        account_id: int,
+        values: Dict,
+        versions: Optional[Set[int]],
+        returning: Sequence,
+    ) -> Optional[Row]:
+        row = versioned_update(cls, account_id, values, versions, returning)
+        db.session.commit()
+        if row is not None:
+            response_cache.invalidate("customers", account_id)
+        return row
+
+    @classmethod
+    def find_by_id(
+        cls, account_id: int, relations: Sequence[str] = ()
+    ) -> CustomerModel:
+        return (
+            cls.query.options(*related_ids(cls, relations))
+            .filter_by(account_id=account_id)
+            .first()
+        )
 
     @classmethod
     def find_all(cls) -> List[CustomerModel]:
         return cls.query.all()
 
     @classmethod
-    def text_search(cls, term: str) -> List[CustomerModel]:
+    def page_query(cls, after: Optional[List] = None):
+        query = cls.query
+        if after is not None:
+            query = query.filter(cls.account_id > after[0])
+
+        return query.order_by(cls.account_id)
+
+    @classmethod
+    def find_page(
+        cls, limit: int, after: Optional[List] = None, relations: Sequence[str] = ()
+    ) -> List[CustomerModel]:
         return (
-            cls.query.filter(cls.__ts_vector__.match(f"{term}:*"))
-            .order_by(cls.account_id)
+            cls.page_query(after)
+            .options(*related_ids(cls, relations))
+            .limit(limit)
             .all()
         )
+
+    @classmethod
+    def find_page_rows(
+        cls, columns: Sequence, limit: int, after: Optional[List] = None
+    ) -> List[Row]:
+        """The same page as find_page, as plain rows of `columns`."""
+        return cls.page_query(after).with_entities(*columns).limit(limit).all()
+
+    @classmethod
+    def search_hits(cls, query, limit: int) -> Select:
+        """Top `limit` matches for a tsquery as (kind, id, label, rank) rows."""
+        rank = db.func.ts_rank_cd(cls.__ts_vector__, query)
+        return (
+            db.select(
+                db.literal("customers").label("kind"),
+                cls.account_id.label("id"),
+                db.func.concat_ws(" ", cls.fname, cls.lname).label("label"),
+                rank.label("rank"),
+            )
+            .where(cls.__ts_vector__.op("@@")(query))
+            .order_by(db.desc(rank), cls.account_id)
+            .limit(limit)
+        )
+
+    @classmethod
+    def fuzzy_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        threshold: Optional[float] = None,
+    ) -> List[Tuple[CustomerModel, None]]:
+        return fuzzy_search(
+            cls,
+            (
+                cls.fname,
+                cls.lname,
+                cls.tel_num,
+                cls.mobile_num,
+            ),
+            term,
+            limit,
+            offset,
+            relations,
+            threshold,
+            tiebreak=(cls.account_id,),
+        )
+
+    @classmethod
+    def text_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        highlight: bool = False,
+    ) -> List[Tuple[CustomerModel, Optional[str]]]:
+        return ranked_search(
+            cls,
+            db.func.concat_ws(
+                " ", cls.fname, cls.lname, cls.address, cls.email, cls.service_type
+            ),
+            term,
+            limit,
+            offset,
+            relations,
+            highlight,
+            tiebreak=(cls.account_id,),
+        )
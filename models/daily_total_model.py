@@ -0,0 +1,85 @@
+from __future__ import annotations
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from common.db import db
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+
+ROLLUP_KEYS = ("date_entered", "utility", "payment_type", "processor")
+ROLLUP_MEASURES = ("amount", "service_charge", "balance_due")
+
+
+class DailyTotalModel(db.Model):
+    """Transaction counts and sums per day, utility, payment type and processor."""
+
+    __tablename__ = "transaction_daily_totals"
+
+    date_entered = db.Column(db.Date, primary_key=True)
+    utility = db.Column(db.String(15), primary_key=True)
+    payment_type = db.Column(db.String(15), primary_key=True)
+    processor = db.Column(db.String(65), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+    amount = db.Column(db.BigInteger, nullable=False, default=0)
+    service_charge = db.Column(db.BigInteger, nullable=False, default=0)
+    balance_due = db.Column(db.BigInteger, nullable=False, default=0)
+
+    @staticmethod
+    def add_delta(deltas: Dict[Tuple, List[int]], values: Dict, sign: int) -> None:
+        """Fold one transaction's keys and measures into `deltas`."""
+        delta = deltas.setdefault(tuple(values[key] for key in ROLLUP_KEYS), [0] * 4)
+        delta[0] += sign
+        for i, measure in enumerate(ROLLUP_MEASURES, 1):
+            delta[i] += sign * values[measure]
+
+    @classmethod
+    def apply_deltas(cls, connection, deltas: Dict[Tuple, List[int]]) -> None:
+        """Upsert `deltas` in the caller's transaction and drop emptied groups."""
+        rows = [
+            dict(zip(ROLLUP_KEYS + ("count",) + ROLLUP_MEASURES, key + tuple(delta)))
+            for key, delta in deltas.items()
+            if any(delta)
+        ]
+        if not rows:
+            return
+
+        table = cls.__table__
+        stmt = insert(table)
+        connection.execute(
+            stmt.on_conflict_do_update(
+                index_elements=list(ROLLUP_KEYS),
+                set_={
+                    name: table.c[name] + stmt.excluded[name]
+                    for name in ("count",) + ROLLUP_MEASURES
+                },
+            ),
+            rows,
+        )
+        connection.execute(
+            table.delete().where(
+                table.c.count <= 0,
+                table.c.date_entered.in_({row["date_entered"] for row in rows}),
+            )
+        )
+
+    @classmethod
+    def totals(
+        cls,
+        group_by: Sequence[str] = (),
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Row]:
+        groups = [getattr(cls, name) for name in group_by]
+        query = db.session.query(
+            *groups,
+            db.func.coalesce(db.func.sum(cls.count), 0).label("count"),
+            db.func.sum(cls.amount).label("amount"),
+            db.func.sum(cls.service_charge).label("service_charge"),
+            db.func.sum(cls.balance_due).label("balance_due"),
+        )
+        if start is not None:
+            query = query.filter(cls.date_entered >= start)
+        if end is not None:
+            query = query.filter(cls.date_entered <= end)
+
+        return query.group_by(*groups).order_by(*groups).all()
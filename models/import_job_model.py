@@ -0,0 +1,31 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import List
+
+from common.db import db
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+class ImportJobModel(db.Model):
+    __tablename__ = "import_jobs"
+
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(15), nullable=False, default="pending")
+    rows_processed = db.Column(db.Integer, nullable=False, default=0)
+    rows_imported = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(JSONB, nullable=False, default=list)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def save_to_db(self):
+        db.session.add(self)
+        db.session.commit()
+
+    @classmethod
+    def find_by_id(cls, job_id: int) -> ImportJobModel:
+        return cls.query.filter_by(job_id=job_id).first()
+
+    @classmethod
+    def find_unfinished(cls) -> List[ImportJobModel]:
+        return cls.query.filter(cls.status.in_(("pending", "running"))).all()
@@ -0,0 +1,37 @@
+from __future__ import annotations
+from datetime import datetime, timezone
+
+from common.db import db
+from sqlalchemy.dialects.postgresql import insert
+
+
+class TokenBlocklistModel(db.Model):
+    __tablename__ = "token_blocklist"
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+    @classmethod
+    def add(cls, jti: str, expires_at: datetime) -> None:
+        db.session.execute(
+            insert(cls.__table__)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[cls.jti])
+        )
+        db.session.commit()
+
+    @classmethod
+    def is_revoked(cls, jti: str) -> bool:
+        return db.session.query(
+            cls.query.filter(
+                cls.jti == jti, cls.expires_at > datetime.now(timezone.utc)
+            ).exists()
+        ).scalar()
+
+    @classmethod
+    def purge_expired(cls) -> int:
+        deleted = cls.query.filter(cls.expires_at <= datetime.now(timezone.utc)).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+        return deleted
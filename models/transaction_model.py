@@ -1,14 +1,42 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set, Tuple
 
+from common.cache import response_cache
 from common.db import db
+from common.loading import related_ids
+from common.versioning import versioned_update
+from common.search import fuzzy_search, ranked_search
 from .user_model import *
 from .customer_model import *
-from datetime import datetime
+from .daily_total_model import DailyTotalModel, ROLLUP_KEYS, ROLLUP_MEASURES
+from datetime import date
+from sqlalchemy import event, inspect
 from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Result, Row
+from sqlalchemy.sql import Select
 from sqlalchemy.types import TypeDecorator
 
 
+# Columns TransactionFilterSchema filters on by equality.
+FILTER_COLUMNS = ("account_id", "user_id", "utility", "payment_type", "processor")
+
+# Columns bulk_insert copies from each row. transaction_id always comes from
+# its sequence and version from its server default.
+BULK_INSERT_COLUMNS = (
+    "receipt_num",
+    "account_id",
+    "customer_name",
+    "description",
+    "amount",
+    "payment_type",
+    "utility",
+    "service_charge",
+    "balance_due",
+    "processor",
+    "user_id",
+)
+
+
 class TsVector(TypeDecorator):
     impl = TSVECTOR
     cache_ok = True
@@ -20,7 +48,7 @@ class TransactionModel(db.Model):
     transaction_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     receipt_num = db.Column(db.String(50), nullable=False)
     date_entered = db.Column(
-        db.Date, default=datetime.today().strftime("%Y-%m-%d"), nullable=False
+        db.Date, primary_key=True, default=date.today, nullable=False
     )
     account_id = db.Column(
         db.Integer, db.ForeignKey("customers.account_id"), nullable=False
@@ -34,6 +62,7 @@ class TransactionModel(db.Model):
     balance_due = db.Column(db.Integer, nullable=False)
     processor = db.Column(db.String(65), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     __ts_vector__ = db.Column(
         TsVector(),
         db.Computed(
@@ -47,28 +76,467 @@ class TransactionModel(db.Model):
 
     __table_args__ = (
         db.Index("trans_vector_idx", __ts_vector__, postgresql_using="gin"),
+        db.Index("trans_date_id_idx", date_entered, transaction_id),
+        db.Index("trans_account_date_idx", account_id, date_entered, transaction_id),
+        db.Index("trans_user_date_idx", user_id, date_entered, transaction_id),
+        db.Index(
+            "trans_utility_payment_date_idx",
+            utility,
+            payment_type,
+            date_entered,
+            transaction_id,
+        ),
+        db.Index("trans_payment_date_idx", payment_type, date_entered, transaction_id),
+        db.Index("trans_processor_date_idx", processor, date_entered, transaction_id),
+        db.Index(
+            "trans_report_idx",
+            date_entered,
+            postgresql_include=[
+                "utility",
+                "payment_type",
+                "processor",
+                "account_id",
+                "amount",
+                "service_charge",
+                "balance_due",
+            ],
+        ),
+        db.Index(
+            "trans_receipt_trgm_idx",
+            receipt_num,
+            postgresql_using="gin",
+            postgresql_ops={"receipt_num": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "trans_customer_trgm_idx",
+            customer_name,
+            postgresql_using="gin",
+            postgresql_ops={"customer_name": "gin_trgm_ops"},
+        ),
+        # Monthly partitions, see common/partitions.py.
+        {"postgresql_partition_by": "RANGE (date_entered)"},
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
+        self.invalidate_cache()
 
     def delete_from_db(self):
         db.session.delete(self)
         db.session.commit()
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        response_cache.invalidate("transactions", self.transaction_id)
+        response_cache.invalidate("customers", self.account_id)
+        response_cache.invalidate("users", self.user_id)
+
+    @classmethod
+    def bulk_insert(cls, rows: List[Dict]) -> None:
+        """Insert already validated rows with one executemany and one commit."""
+        # Every row gets the same keys, as executemany needs.
+        today = date.today()
+        values = [
+            {
+                "date_entered": row.get("date_entered") or today,
+                **{key: row[key] for key in BULK_INSERT_COLUMNS},
+            }
+            for row in rows
+        ]
+        db.session.execute(cls.__table__.insert(), values)
+
+        deltas, balances = {}, {}
+        for row in values:
+            _add_delta(deltas, balances, row, 1)
+        _apply_deltas(db.session.connection(), deltas, balances)
+        db.session.commit()
+        response_cache.invalidate("transactions")
+        response_cache.invalidate("customers", *{row["account_id"] for row in rows})
+        response_cache.invalidate("users", *{row["user_id"] for row in rows})
+
+    @classmethod
+    def totals(
+        cls,
+        group_by: Sequence[str] = (),
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Row]:
+        """Count and sum the money columns per `group_by` group in SQL.
+
+        Groupings the daily rollup covers are answered from it instead of
+        scanning the transactions themselves.
+        """
+        if set(group_by) <= set(ROLLUP_KEYS):
+            return DailyTotalModel.totals(group_by, start, end)
+
+        groups = [getattr(cls, name) for name in group_by]
+        query = db.session.query(
+            *groups,
+            db.func.count().label("count"),
+            db.func.sum(cls.amount).label("amount"),
+            db.func.sum(cls.service_charge).label("service_charge"),
+            db.func.sum(cls.balance_due).label("balance_due"),
+        )
+        if start is not None:
+            query = query.filter(cls.date_entered >= start)
+        if end is not None:
+            query = query.filter(cls.date_entered <= end)
+
+        return query.group_by(*groups).order_by(*groups).all()
+
+    @classmethod
+    def rebuild_daily_totals(
+        cls, start: Optional[date] = None, end: Optional[date] = None
+    ) -> int:
+        """Recompute the daily rollup for a date range from the transactions."""
+        rollup = DailyTotalModel.__table__
+        source = db.select(
+            *[getattr(cls, key) for key in ROLLUP_KEYS],
+            db.func.count(),
+            *[db.func.sum(getattr(cls, measure)) for measure in ROLLUP_MEASURES],
+        ).group_by(*[getattr(cls, key) for key in ROLLUP_KEYS])
+        stale = rollup.delete()
+        if start is not None:
+            source = source.where(cls.date_entered >= start)
+            stale = stale.where(rollup.c.date_entered >= start)
+        if end is not None:
+            source = source.where(cls.date_entered <= end)
+            stale = stale.where(rollup.c.date_entered <= end)
+
+        # Writers upsert into the rollup under ROW EXCLUSIVE, so this waits for
+        # in-flight transactions and holds off new ones until the commit.
+        db.session.execute(
+            db.text(f"LOCK TABLE {rollup.name} IN SHARE ROW EXCLUSIVE MODE")
+        )
+        db.session.execute(stale)
+        inserted = db.session.execute(
+            rollup.insert().from_select(
+                list(ROLLUP_KEYS) + ["count"] + list(ROLLUP_MEASURES), source
+            )
+        ).rowcount
+        db.session.commit()
+        return inserted
+
+    @classmethod
+    def rebuild_balances(cls) -> int:
+        """Recompute every customer's cached balance from the transactions."""
+        customers = CustomerModel.__table__
+        totals = (
+            db.select(db.func.coalesce(db.func.sum(cls.balance_due), 0))
+            .where(cls.account_id == customers.c.account_id)
+            .scalar_subquery()
+        )
+        updated = db.session.execute(
+            customers.update().values(current_balance=totals)
+        ).rowcount
+        db.session.commit()
+        response_cache.invalidate("customers")
+        return updated
+
+    @classmethod
+    def balance_since(cls, account_id: int, day: date) -> int:
+        """Sum of `balance_due` a customer accrued after `day`."""
+        return (
+            db.session.query(db.func.coalesce(db.func.sum(cls.balance_due), 0))
+            .filter(cls.account_id == account_id, cls.date_entered > day)
+            .scalar()
+        )
 
     @classmethod
-    def find_by_id(cls, transaction_id: int) -> TransactionModel:
-        return cls.query.filter_by(transaction_id=transaction_id).first()
+    def statement(
+        cls,
+        account_id: int,
+        limit: int,
+        balance: int,
+        after: Optional[List] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+    ) -> List[Row]:
+        """Newest first page of a customer's transactions with running balances.
+
+        `balance` is the customer's balance after the first row of the page;
+        every later row subtracts the `balance_due` of the rows above it.
+        """
+        order = (db.desc(cls.date_entered), db.desc(cls.transaction_id))
+        above = db.func.sum(cls.balance_due).over(order_by=order, rows=(None, -1))
+        query = db.session.query(
+            cls.transaction_id,
+            cls.date_entered,
+            cls.receipt_num,
+            cls.description,
+            cls.utility,
+            cls.payment_type,
+            cls.amount,
+            cls.service_charge,
+            cls.balance_due,
+            (balance - db.func.coalesce(above, 0)).label("balance"),
+        ).filter(cls.account_id == account_id)
+        if start is not None:
+            query = query.filter(cls.date_entered >= start)
+        if end is not None:
+            query = query.filter(cls.date_entered <= end)
+        if after is not None:
+            query = query.filter(
+                db.tuple_(cls.date_entered, cls.transaction_id) < db.tuple_(*after)
+            )
+
+        return query.order_by(*order).limit(limit).all()
+
+    @classmethod
+    def update_by_id(
+        cls,
+        transaction_id: int,
+        values: Dict,
+        versions: Optional[Set[int]],
+        returning: Sequence,
+    ) -> Optional[Row]:
+        """Update in one statement, carrying the change into the aggregates.
+
+        The previous values come from a locking sub-select in the same UPDATE,
+        so the rollup and balance deltas need no separate read.
+        """
+        table = cls.__table__
+        tracked = TRACKED_COLUMNS + ("user_id",)
+        old = (
+            db.select(table.c.transaction_id, *[table.c[name] for name in tracked])
+            .where(table.c.transaction_id == transaction_id)
+            .with_for_update()
+            .subquery("old")
+        )
+        row = versioned_update(
+            cls,
+            transaction_id,
+            values,
+            versions,
+            [
+                *returning,
+                *[old.c[name].label(f"old_{name}") for name in tracked],
+                *[table.c[name].label(f"new_{name}") for name in tracked],
+            ],
+            table.c.transaction_id == old.c.transaction_id,
+        )
+        if row is None:
+            db.session.commit()
+            return None
+
+        before = {name: row._mapping[f"old_{name}"] for name in tracked}
+        after = {name: row._mapping[f"new_{name}"] for name in tracked}
+        if before != after:
+            deltas, balances = {}, {}
+            _add_delta(deltas, balances, before, -1)
+            _add_delta(deltas, balances, after, 1)
+            _apply_deltas(db.session.connection(), deltas, balances)
+        db.session.commit()
+
+        response_cache.invalidate("transactions", transaction_id)
+        response_cache.invalidate(
+            "customers", before["account_id"], after["account_id"]
+        )
+        response_cache.invalidate("users", before["user_id"], after["user_id"])
+        return row
+
+    @classmethod
+    def find_by_id(
+        cls, transaction_id: int, relations: Sequence[str] = ()
+    ) -> TransactionModel:
+        return (
+            cls.query.options(*related_ids(cls, relations))
+            .filter_by(transaction_id=transaction_id)
+            .first()
+        )
 
     @classmethod
     def get_all(cls) -> List[TransactionModel]:
         return cls.query.order_by(db.desc(cls.date_entered)).all()
 
     @classmethod
-    def text_search(cls, term: str) -> List[TransactionModel]:
+    def page_query(cls, after: Optional[List] = None, filters: Optional[Dict] = None):
+        query = cls.query
+        if filters:
+            query = cls.filtered(query, filters)
+        if after is not None:
+            query = query.filter(
+                db.tuple_(cls.date_entered, cls.transaction_id) < db.tuple_(*after)
+            )
+
+        return query.order_by(db.desc(cls.date_entered), db.desc(cls.transaction_id))
+
+    @classmethod
+    def find_page(
+        cls,
+        limit: int,
+        after: Optional[List] = None,
+        relations: Sequence[str] = (),
+        filters: Optional[Dict] = None,
+    ) -> List[TransactionModel]:
         return (
-            cls.query.filter(cls.__ts_vector__.match(f"{term}:*"))
-            .order_by(db.desc(cls.date_entered))
+            cls.page_query(after, filters)
+            .options(*related_ids(cls, relations))
+            .limit(limit)
             .all()
         )
+
+    @classmethod
+    def find_page_rows(
+        cls,
+        columns: Sequence,
+        limit: int,
+        after: Optional[List] = None,
+        filters: Optional[Dict] = None,
+    ) -> List[Row]:
+        """The same page as find_page, as plain rows of `columns`."""
+        return cls.page_query(after, filters).with_entities(*columns).limit(limit).all()
+
+    @classmethod
+    def filtered(cls, query, filters: Dict):
+        """Apply the structured filters of TransactionFilterSchema to `query`."""
+        for name in FILTER_COLUMNS:
+            if name in filters:
+                query = query.filter(getattr(cls, name) == filters[name])
+        if "start" in filters:
+            query = query.filter(cls.date_entered >= filters["start"])
+        if "end" in filters:
+            query = query.filter(cls.date_entered <= filters["end"])
+        if "min_amount" in filters:
+            query = query.filter(cls.amount >= filters["min_amount"])
+        if "max_amount" in filters:
+            query = query.filter(cls.amount <= filters["max_amount"])
+
+        return query
+
+    @classmethod
+    def export_rows(cls, batch_size: int) -> Result:
+        """Stream every transaction through a server-side cursor."""
+        columns = [col for col in cls.__table__.columns if col.key != "__ts_vector__"]
+        return (
+            db.session.execute(
+                db.select(*columns)
+                .order_by(db.desc(cls.date_entered), db.desc(cls.transaction_id))
+                .execution_options(stream_results=True)
+            )
+        ).yield_per(batch_size)
+
+    @classmethod
+    def search_hits(cls, query, limit: int) -> Select:
+        """Top `limit` matches for a tsquery as (kind, id, label, rank) rows."""
+        rank = db.func.ts_rank_cd(cls.__ts_vector__, query)
+        return (
+            db.select(
+                db.literal("transactions").label("kind"),
+                cls.transaction_id.label("id"),
+                db.func.concat_ws(" ", cls.receipt_num, cls.customer_name).label(
+                    "label"
+                ),
+                rank.label("rank"),
+            )
+            .where(cls.__ts_vector__.op("@@")(query))
+            .order_by(
+                db.desc(rank), db.desc(cls.date_entered), db.desc(cls.transaction_id)
+            )
+            .limit(limit)
+        )
+
+    @classmethod
+    def fuzzy_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        threshold: Optional[float] = None,
+    ) -> List[Tuple[TransactionModel, None]]:
+        return fuzzy_search(
+            cls,
+            (
+                cls.receipt_num,
+                cls.customer_name,
+            ),
+            term,
+            limit,
+            offset,
+            relations,
+            threshold,
+            tiebreak=(
+                db.desc(cls.date_entered),
+                db.desc(cls.transaction_id),
+            ),
+        )
+
+    @classmethod
+    def text_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        highlight: bool = False,
+    ) -> List[Tuple[TransactionModel, Optional[str]]]:
+        return ranked_search(
+            cls,
+            db.func.concat_ws(
+                " ",
+                cls.receipt_num,
+                cls.customer_name,
+                cls.description,
+                cls.utility,
+                cls.processor,
+            ),
+            term,
+            limit,
+            offset,
+            relations,
+            highlight,
+            tiebreak=(
+                db.desc(cls.date_entered),
+                db.desc(cls.transaction_id),
+            ),
+        )
+
+
+TRACKED_COLUMNS = ROLLUP_KEYS + ROLLUP_MEASURES + ("account_id",)
+
+
+def _flushed_values(state) -> Dict:
+    """Tracked columns of a flushed transaction as they were before the flush."""
+    values = {}
+    for name in TRACKED_COLUMNS:
+        history = state.attrs[name].history
+        values[name] = (history.deleted or history.unchanged or history.added)[0]
+    return values
+
+
+def _add_delta(deltas: Dict, balances: Dict, values: Dict, sign: int) -> None:
+    DailyTotalModel.add_delta(deltas, values, sign)
+    account_id = values["account_id"]
+    balances[account_id] = balances.get(account_id, 0) + sign * values["balance_due"]
+
+
+def _apply_deltas(connection, deltas: Dict, balances: Dict) -> None:
+    DailyTotalModel.apply_deltas(connection, deltas)
+    CustomerModel.apply_balance_deltas(connection, balances)
+
+
+@event.listens_for(db.session, "after_flush")
+def update_aggregates(session, flush_context) -> None:
+    """Carry changed transactions into the daily rollup and customer balances."""
+    deltas, balances = {}, {}
+    for instance in session.new:
+        if isinstance(instance, TransactionModel):
+            _add_delta(deltas, balances, inspect(instance).dict, 1)
+    for instance in session.deleted:
+        if isinstance(instance, TransactionModel):
+            _add_delta(deltas, balances, _flushed_values(inspect(instance)), -1)
+    for instance in session.dirty:
+        if isinstance(instance, TransactionModel):
+            state = inspect(instance)
+            old = _flushed_values(state)
+            new = {name: state.dict[name] for name in TRACKED_COLUMNS}
+            if old != new:
+                _add_delta(deltas, balances, old, -1)
+                _add_delta(deltas, balances, new, 1)
+
+    if deltas:
+        _apply_deltas(session.connection(), deltas, balances)
@@ -1,7 +1,13 @@
 from __future__ import annotations
-from typing import List
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from common.cache import response_cache
 from common.db import db
+from common.loading import related_ids
+from common.versioning import versioned_update
+from common.search import fuzzy_search, ranked_search
 from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.engine import Row
+from sqlalchemy.sql import Select
 from sqlalchemy.types import TypeDecorator
 from .transaction_model import *
 
@@ -20,6 +26,7 @@ class UserModel(db.Model):
     lname = db.Column(db.String(65), nullable=False)
     password = db.Column(db.String(254), nullable=False)
     role = db.Column(db.String(20), nullable=False)
+    version = db.Column(db.Integer, nullable=False, server_default="1")
     __ts_vector__ = db.Column(
         TsVector(),
         db.Computed(
@@ -30,32 +37,148 @@ class UserModel(db.Model):
 
     transaction = db.relationship("TransactionModel")
 
-    __table_args__ = (db.Index("vector_idx", __ts_vector__, postgresql_using="gin"),)
+    __table_args__ = (
+        db.Index("vector_idx", __ts_vector__, postgresql_using="gin"),
+        db.Index(
+            "user_fname_trgm_idx",
+            fname,
+            postgresql_using="gin",
+            postgresql_ops={"fname": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "user_lname_trgm_idx",
+            lname,
+            postgresql_using="gin",
+            postgresql_ops={"lname": "gin_trgm_ops"},
+        ),
+    )
+
+    __mapper_args__ = {"version_id_col": version}
 
     def save_to_db(self):
         db.session.add(self)
         db.session.commit()
+        self.invalidate_cache()
 
     def delete_from_db(self):
         db.session.delete(self)
         db.session.commit()
+        self.invalidate_cache()
+
+    def invalidate_cache(self):
+        response_cache.invalidate("users", self.user_id)
 
     @classmethod
     def find_by_username(cls, username: str) -> UserModel:
         return cls.query.filter_by(user_name=username).first()
 
     @classmethod
-    def find_by_id(cls, user_id: int) -> UserModel:
-        return cls.query.filter_by(user_id=user_id).first()
+    def update_by_id(
+        cls,
+        user_id: int,
+        values: Dict,
+        versions: Optional[Set[int]],
+        returning: Sequence,
+    ) -> Optional[Row]:
+        row = versioned_update(cls, user_id, values, versions, returning)
+        db.session.commit()
+        if row is not None:
+            response_cache.invalidate("users", user_id)
+        return row
+
+    @classmethod
+    def find_by_id(cls, user_id: int, relations: Sequence[str] = ()) -> UserModel:
+        return (
+            cls.query.options(*related_ids(cls, relations))
+            .filter_by(user_id=user_id)
+            .first()
+        )
 
     @classmethod
     def find_all(cls) -> List[UserModel]:
         return cls.query.order_by(cls.user_id).all()
 
     @classmethod
-    def text_search(cls, term: str) -> List[UserModel]:
+    def page_query(cls, after: Optional[List] = None):
+        query = cls.query
+        if after is not None:
+            query = query.filter(cls.user_id > after[0])
+
+        return query.order_by(cls.user_id)
+
+    @classmethod
+    def find_page(
+        cls, limit: int, after: Optional[List] = None, relations: Sequence[str] = ()
+    ) -> List[UserModel]:
         return (
-            cls.query.filter(cls.__ts_vector__.match(f"{term}:*"))
-            .order_by(cls.user_id)
+            cls.page_query(after)
+            .options(*related_ids(cls, relations))
+            .limit(limit)
             .all()
         )
+
+    @classmethod
+    def find_page_rows(
+        cls, columns: Sequence, limit: int, after: Optional[List] = None
+    ) -> List[Row]:
+        """The same page as find_page, as plain rows of `columns`."""
+        return cls.page_query(after).with_entities(*columns).limit(limit).all()
+
+    @classmethod
+    def search_hits(cls, query, limit: int) -> Select:
+        """Top `limit` matches for a tsquery as (kind, id, label, rank) rows."""
+        rank = db.func.ts_rank_cd(cls.__ts_vector__, query)
+        return (
+            db.select(
+                db.literal("users").label("kind"),
+                cls.user_id.label("id"),
+                cls.user_name.label("label"),
+                rank.label("rank"),
+            )
+            .where(cls.__ts_vector__.op("@@")(query))
+            .order_by(db.desc(rank), cls.user_id)
+            .limit(limit)
+        )
+
+    @classmethod
+    def fuzzy_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        threshold: Optional[float] = None,
+    ) -> List[Tuple[UserModel, None]]:
+        return fuzzy_search(
+            cls,
+            (
+                cls.fname,
+                cls.lname,
+            ),
+            term,
+            limit,
+            offset,
+            relations,
+            threshold,
+            tiebreak=(cls.user_id,),
+        )
+
+    @classmethod
+    def text_search(
+        cls,
+        term: str,
+        limit: int,
+        offset: int = 0,
+        relations: Sequence[str] = (),
+        highlight: bool = False,
+    ) -> List[Tuple[UserModel, Optional[str]]]:
+        return ranked_search(
+            cls,
+            db.func.concat_ws(" ", cls.user_name, cls.fname, cls.lname, cls.role),
+            term,
+            limit,
+            offset,
+            relations,
+            highlight,
+            tiebreak=(cls.user_id,),
+        )
@@ -0,0 +1,41 @@
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from flask_restful import Resource
+from typing import Dict, Optional, Tuple
+
+from common.profiler import slow_query_log
+from models.user_model import UserModel
+
+from flask_apispec import doc
+from flask_apispec import MethodResource
+
+ADMIN_REQUIRED = "Admin privileges required."
+SLOW_QUERIES_CLEARED = "Slow query log cleared."
+
+
+def admin_error() -> Optional[Tuple[Dict, int]]:
+    user = UserModel.find_by_id(get_jwt_identity())
+    if user is None or user.role != "Admin":
+        return {"message": ADMIN_REQUIRED}, 403
+
+    return None
+
+
+class SlowQueries(Resource, MethodResource):
+    @doc(tags=["Admin"])
+    @jwt_required()
+    def get(self) -> Tuple[Dict, int]:
+        error = admin_error()
+        if error:
+            return error
+
+        return {"slow_queries": slow_query_log.entries()}, 200
+
+    @doc(tags=["Admin"])
+    @jwt_required()
+    def delete(self) -> Tuple[Dict, int]:
+        error = admin_error()
+        if error:
+            return error
+
+        slow_query_log.clear()
+        return {"message": SLOW_QUERIES_CLEARED}, 200
@@ -1,7 +1,26 @@
 from flask import request
 from flask_restful import Resource
 from models.customer_model import CustomerModel
+from models.transaction_model import TransactionModel
 from schemas.customer_schema import CustomerSchema
+from schemas.import_job_schema import ImportJobSchema
+from models.import_job_model import ImportJobModel
+from common.importer import customer_importer
+from common.uploads import imports, import_filename
+from flask_uploads import extension
+from schemas.report_schema import StatementSchema
+from common.serializers import RowSerializer
+from schemas.query_schema import (
+    list_args_schema,
+    search_args_schema,
+    statement_args_schema,
+)
+from common.pagination import cursor_offset, page_args, split_page
+from common.cache import cached_response, response_cache, updated_response
+from common.encoding import encoded_response
+from common.versioning import PRECONDITION_FAILED, if_match_versions
+from common.search import dump_hits, validate_term
+from datetime import date
 from typing import Dict, Tuple
 
 from flask_apispec import marshal_with
@@ -12,9 +31,18 @@ INSERT_ERROR = "An error occured while adding the customer."
 CUSTOMER_NOT_FOUND = "Could not find customer(s)."
 CUSTOMER_DELETED = "Customer account deleted."
 SERVER_ERROR = "Operation could not be completed."
+IMPORT_NO_FILE = "Upload a .csv or .xlsx file in the 'file' form field."
+IMPORT_NOT_FOUND = "Could not find the import job."
 
 customer_schema = CustomerSchema()
 customer_list_schema = CustomerSchema(many=True)
+customer_update_schema = CustomerSchema(load_instance=False, exclude=("transaction",))
+customer_rows = RowSerializer(CustomerSchema, "account_id")
+import_job_schema = ImportJobSchema()
+statement_schema = StatementSchema()
+
+# Relationships dumped by the customer schema, loaded up front with the query.
+CUSTOMER_RELATIONS = ("transaction",)
 
 
 class NewCustomer(Resource, MethodResource):
@@ -37,45 +65,54 @@ class Customer(Resource, MethodResource):
     @doc(tags=["Customer"])
     @marshal_with(customer_schema, apply=False)
     def get(cls, account_id: int) -> Tuple[Dict, int]:
-        try:
-            customer = CustomerModel.find_by_id(account_id)
-        except:
-            return {"message": SERVER_ERROR}, 500
+        key = ("customers", account_id)
+        entry = response_cache.get(key)
+
+        if entry is None:
+            try:
+                customer = CustomerModel.find_by_id(account_id, CUSTOMER_RELATIONS)
+            except:
+                return {"message": SERVER_ERROR}, 500
 
-        if customer is not None:
-            return customer_schema.dump(customer)
+            if customer is None:
+                return {"message": CUSTOMER_NOT_FOUND}, 404
 
-        return {"message": CUSTOMER_NOT_FOUND}, 404
+            entry = response_cache.set(
+                key, customer_schema.dump(customer), customer.version
+            )
+
+        return cached_response(entry)
 
     @doc(tags=["Customer"])
     @use_kwargs(customer_schema, location=("json"), apply=False)
     @marshal_with(customer_schema, apply=False)
     def put(cls, account_id: int) -> Tuple[Dict, int]:
-        customer_json = request.get_json()
-        customer_data = customer_schema.load(customer_json)
+        return cls._update(account_id, partial=False)
+
+    @doc(tags=["Customer"])
+    @use_kwargs(customer_schema, location=("json"), apply=False)
+    @marshal_with(customer_schema, apply=False)
+    def patch(cls, account_id: int) -> Tuple[Dict, int]:
+        return cls._update(account_id, partial=True)
+
+    def _update(cls, account_id: int, partial: bool) -> Tuple[Dict, int]:
+        values = customer_update_schema.load(request.get_json(), partial=partial)
+        names, columns = customer_rows.select()
 
         try:
-            customer = CustomerModel.find_by_id(account_id)
+            row = CustomerModel.update_by_id(
+                account_id, values, if_match_versions(), columns
+            )
+            if row is None:
+                if CustomerModel.find_by_id(account_id) is None:
+                    return {"message": CUSTOMER_NOT_FOUND}, 404
+                return {"message": PRECONDITION_FAILED}, 412
         except:
             return {"message": SERVER_ERROR}, 500
 
-        if customer:
-            try:
-                customer.fname = customer_data.fname
-                customer.lname = customer_data.lname
-                customer.address = customer_data.address
-                customer.email = customer_data.email
-                customer.tel_num = customer_data.tel_num
-                customer.mobile_num = customer_data.mobile_num
-                customer.service_type = customer_data.service_type
-                customer.comments = customer_data.comments
-
-                customer.save_to_db()
-                return customer_schema.dump(customer), 200
-            except:
-                return {"message": SERVER_ERROR}, 500
-
-        return {"message": CUSTOMER_NOT_FOUND}, 404
+        return updated_response(
+            ("customers", account_id), customer_rows.dump([row], names)[0], row.version
+        )
 
     @doc(tags=["Customer"])
     @marshal_with(customer_schema, apply=False)
@@ -94,26 +131,162 @@ class Customer(Resource, MethodResource):
 
 class AllCustomers(Resource, MethodResource):
     @doc(tags=["Customer"])
+    @use_kwargs(list_args_schema, location=("query"), apply=False)
     @marshal_with(customer_list_schema, code=200, apply=False)
     def get(self) -> Tuple[Dict, int]:
+        key = ("customers", "list", request.query_string)
+        entry = response_cache.get(key)
+
+        if entry is None:
+            args = list_args_schema.load(request.args)
+            limit, after = page_args((int,), args)
+            names, columns = customer_rows.select(
+                args.get("only"), required=("account_id",)
+            )
+
+            try:
+                rows = CustomerModel.find_page_rows(columns, limit + 1, after)
+            except:
+                return {"message": SERVER_ERROR}, 500
+
+            rows, next_cursor = split_page(rows, limit, lambda row: (row.account_id,))
+            entry = response_cache.set(
+                key,
+                customer_rows.payload(
+                    "customers", rows, names, args["format"], next_cursor
+                ),
+            )
+
+        return cached_response(entry)
+
+
+class CustomerStatement(Resource, MethodResource):
+    @doc(tags=["Customer"])
+    @use_kwargs(statement_args_schema, location=("query"), apply=False)
+    @marshal_with(statement_schema, code=200, apply=False)
+    def get(self, account_id: int) -> Tuple[Dict, int]:
+        args = statement_args_schema.load(request.args)
+        # The cursor carries the balance after its row's predecessor, so later
+        # pages never have to sum the history above them.
+        limit, after = page_args((date.fromisoformat, int, int), args)
+        start, end = args.get("start"), args.get("end")
+
         try:
-            customers = CustomerModel.find_all()
+            customer = CustomerModel.find_by_id(account_id)
+            if customer is None:
+                return {"message": CUSTOMER_NOT_FOUND}, 404
+
+            if after is not None:
+                *after, balance = after
+            elif end is not None:
+                balance = customer.current_balance - TransactionModel.balance_since(
+                    account_id, end
+                )
+            else:
+                balance = customer.current_balance
+
+            lines = TransactionModel.statement(
+                account_id, limit + 1, balance, after, start, end
+            )
         except:
             return {"message": SERVER_ERROR}, 500
 
-        return {"customers": customer_list_schema.dump(customers)}, 200
+        lines, next_cursor = split_page(
+            lines,
+            limit,
+            lambda line: (
+                line.date_entered,
+                line.transaction_id,
+                line.balance - line.balance_due,
+            ),
+        )
+        return encoded_response(
+            statement_schema.dump(
+                {
+                    "account_id": account_id,
+                    "current_balance": customer.current_balance,
+                    "transactions": lines,
+                    "next": next_cursor,
+                }
+            )
+        )
 
 
 class CustomerSearch(Resource, MethodResource):
     @doc(tags=["Customer"])
+    @use_kwargs(search_args_schema, location=("query"), apply=False)
     @marshal_with(customer_list_schema, code=200, apply=False)
     def get(self, term: str) -> Tuple[Dict, int]:
+        args = search_args_schema.load(request.args)
+        term = validate_term(term)
+        limit, after = page_args((cursor_offset,), args)
+        offset = after[0] if after else 0
+
         try:
-            results = CustomerModel.text_search(term)
+            if args["mode"] == "fuzzy":
+                results = CustomerModel.fuzzy_search(
+                    term, limit + 1, offset, CUSTOMER_RELATIONS, args.get("threshold")
+                )
+            else:
+                results = CustomerModel.text_search(
+                    term, limit + 1, offset, CUSTOMER_RELATIONS, args["highlight"]
+                )
         except:
             return {"message": SERVER_ERROR}, 500
 
         if results:
-            return {"customers": customer_list_schema.dump(results)}, 200
+            results, next_cursor = split_page(
+                results, limit, lambda _: (offset + limit,)
+            )
+            return encoded_response(
+                {
+                    "customers": dump_hits(
+                        customer_list_schema, results, args["highlight"]
+                    ),
+                    "next": next_cursor,
+                }
+            )
 
         return {"message": CUSTOMER_NOT_FOUND}, 404
+
+
+class CustomerImport(Resource, MethodResource):
+    @doc(tags=["Customer"], consumes=["multipart/form-data"])
+    @marshal_with(import_job_schema, code=202, apply=False)
+    def post(self) -> Tuple[Dict, int]:
+        upload = request.files.get("file")
+        if upload is None or not imports.extension_allowed(
+            extension(upload.filename).lower()
+        ):
+            return {"message": IMPORT_NO_FILE}, 400
+
+        try:
+            job = ImportJobModel(filename=upload.filename)
+            job.save_to_db()
+            filename = imports.save(
+                upload, name=import_filename(job.job_id, job.filename)
+            )
+            customer_importer.submit(job.job_id, imports.path(filename))
+        except:
+            return {"message": SERVER_ERROR}, 500
+
+        return (
+            import_job_schema.dump(job),
+            202,
+            {"Location": "/customers/import/{}".format(job.job_id)},
+        )
+
+
+class CustomerImportStatus(Resource, MethodResource):
+    @doc(tags=["Customer"])
+    @marshal_with(import_job_schema, apply=False)
+    def get(self, job_id: int) -> Tuple[Dict, int]:
+        try:
+            job = ImportJobModel.find_by_id(job_id)
+        except:
+            return {"message": SERVER_ERROR}, 500
+
+        if job is not None:
+            return import_job_schema.dump(job), 200
+
+        return {"message": IMPORT_NOT_FOUND}, 404
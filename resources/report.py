@@ -0,0 +1,34 @@
+from flask import request
+from flask_restful import Resource
+from typing import Dict, Tuple
+
+from common.encoding import encoded_response
+from models.transaction_model import TransactionModel
+from schemas.query_schema import report_args_schema
+from schemas.report_schema import TransactionTotalsSchema
+
+from flask_apispec import marshal_with, doc, use_kwargs
+from flask_apispec import MethodResource
+
+SERVER_ERROR = "Operation could not be completed."
+
+totals_list_schema = TransactionTotalsSchema(many=True)
+
+
+class TransactionTotals(Resource, MethodResource):
+    @doc(tags=["Report"])
+    @use_kwargs(report_args_schema, location=("query"), apply=False)
+    @marshal_with(totals_list_schema, code=200, apply=False)
+    def get(self) -> Tuple[Dict, int]:
+        args = report_args_schema.load(request.args)
+
+        try:
+            totals = TransactionModel.totals(
+                args["group_by"], args.get("start"), args.get("end")
+            )
+        except:
+            return {"message": SERVER_ERROR}, 500
+
+        return encoded_response(
+            {"totals": totals_list_schema.dump(row._asdict() for row in totals)}
+        )
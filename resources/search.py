@@ -0,0 +1,42 @@
+from flask import current_app, request
+from flask_restful import Resource
+from typing import Dict, Tuple
+
+from common.encoding import encoded_response
+from common.search import unified_search, validate_term
+from models.customer_model import CustomerModel
+from models.transaction_model import TransactionModel
+from models.user_model import UserModel
+from schemas.query_schema import unified_search_args_schema
+
+from flask_apispec import doc, use_kwargs
+from flask_apispec import MethodResource
+
+SERVER_ERROR = "Operation could not be completed."
+
+SEARCHED_MODELS = (CustomerModel, TransactionModel, UserModel)
+
+
+class UnifiedSearch(Resource, MethodResource):
+    @doc(tags=["Search"])
+    @use_kwargs(unified_search_args_schema, location=("query"), apply=False)
+    def get(self) -> Tuple[Dict, int]:
+        args = unified_search_args_schema.load(request.args)
+        term = validate_term(args["q"])
+        limit = min(
+            args.get("limit", current_app.config["UNIFIED_SEARCH_LIMIT"]),
+            current_app.config["PAGINATION_MAX_LIMIT"],
+        )
+
+        try:
+            hits = unified_search(term, limit, SEARCHED_MODELS)
+        except:
+            return {"message": SERVER_ERROR}, 500
+
+        results = {model.__tablename__: [] for model in SEARCHED_MODELS}
+        for hit in sorted(hits, key=lambda hit: hit.rank, reverse=True):
+            results[hit.kind].append(
+                {"id": hit.id, "label": hit.label, "rank": hit.rank}
+            )
+
+        return encoded_response(results)
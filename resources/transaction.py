@@ -1,23 +1,54 @@
 from flask_jwt_extended import jwt_required, get_jwt
 from flask_jwt_extended.utils import get_jwt_identity
-from flask import json, request
+from flask import json, request, current_app, Response, stream_with_context
 from flask_restful import Resource
 from typing import Dict, Tuple
+from datetime import date
 
 from sqlalchemy.orm import query
+from sqlalchemy.exc import IntegrityError
+from marshmallow import ValidationError
+from common.db import db
 from models.transaction_model import TransactionModel
 from schemas.transaction_schema import TransactionSchema
+from schemas.query_schema import (
+    transaction_filter_schema,
+    search_args_schema,
+    export_args_schema,
+)
+from common.pagination import cursor_offset, page_args, split_page
+from common.serializers import RowSerializer
+from common.cache import cached_response, response_cache, updated_response
+from common.encoding import encoded_response
+from common.versioning import PRECONDITION_FAILED, if_match_versions
+from common.search import dump_hits, validate_term
+from common.export import csv_stream, ndjson_stream
 
 from flask_apispec import marshal_with, doc, use_kwargs
 from flask_apispec import MethodResource
 
 INSERT_ERROR = "An error occured while adding the transactiion."
+BULK_INVALID_BODY = "Expected a JSON array or NDJSON body of transactions."
+BULK_TOO_LARGE = "A bulk request may contain at most {} transactions."
+BULK_INTEGRITY_ERROR = (
+    "No transactions were added, a row references a missing customer or user."
+)
 NOT_FOUND = "Could not find the transaction(s)."
 DELETION = "Transaction entry successfully deleted."
 SERVER_ERROR = "Operation could not be completed."
 
 transaction_schema = TransactionSchema()
 transaction_list = TransactionSchema(many=True)
+# The primary key columns are never rewritten by an update.
+transaction_update_schema = TransactionSchema(
+    load_instance=False,
+    exclude=("customers", "users", "transaction_id", "date_entered"),
+)
+transaction_rows = RowSerializer(TransactionSchema, "transaction_id")
+transaction_bulk_schema = TransactionSchema(many=True, load_instance=False)
+
+# Relationships dumped by the transaction schema, loaded up front with the query.
+TRANSACTION_RELATIONS = ("customers", "users")
 
 
 class NewTransaction(Resource, MethodResource):
@@ -36,51 +67,109 @@ class NewTransaction(Resource, MethodResource):
         return transaction_schema.dump(transaction), 201
 
 
+class BulkTransactions(Resource, MethodResource):
+    @doc(tags=["Transaction"])
+    @use_kwargs(transaction_bulk_schema, location=("json"), apply=False)
+    def post(self) -> Tuple[Dict, int]:
+        if request.mimetype == "application/x-ndjson":
+            rows = []
+            for line in request.get_data(as_text=True).splitlines():
+                if line.strip():
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        rows.append(None)  # Reported as invalid input below.
+        else:
+            rows = request.get_json(silent=True)
+
+        if not isinstance(rows, list):
+            return {"message": BULK_INVALID_BODY}, 400
+
+        max_rows = current_app.config["BULK_MAX_ROWS"]
+        if len(rows) > max_rows:
+            return {"message": BULK_TOO_LARGE.format(max_rows)}, 413
+
+        try:
+            valid_rows = transaction_bulk_schema.load(rows)
+            errors = {}
+        except ValidationError as err:
+            errors = err.messages
+            valid_rows = [
+                row for index, row in enumerate(err.valid_data) if index not in errors
+            ]
+
+        if valid_rows:
+            try:
+                TransactionModel.bulk_insert(valid_rows)
+            except IntegrityError:
+                db.session.rollback()
+                return {"message": BULK_INTEGRITY_ERROR, "errors": errors}, 400
+            except:
+                db.session.rollback()
+                return {"message": SERVER_ERROR}, 500
+
+        return (
+            {"inserted": len(valid_rows), "errors": errors},
+            201 if valid_rows else 400,
+        )
+
+
 class Transaction(Resource, MethodResource):
     @doc(tags=["Transaction"])
     @marshal_with(transaction_schema, apply=False)
     def get(self, transaction_id: int) -> Tuple[Dict, int]:
-        try:
-            transaction = TransactionModel.find_by_id(transaction_id)
-        except:
-            return {"message": SERVER_ERROR}, 500
+        key = ("transactions", transaction_id)
+        entry = response_cache.get(key)
 
-        if transaction:
-            return transaction_schema.dump(transaction)
+        if entry is None:
+            try:
+                transaction = TransactionModel.find_by_id(
+                    transaction_id, TRANSACTION_RELATIONS
+                )
+            except:
+                return {"message": SERVER_ERROR}, 500
 
-        return {"message": NOT_FOUND}, 404
+            if not transaction:
+                return {"message": NOT_FOUND}, 404
+
+            entry = response_cache.set(
+                key, transaction_schema.dump(transaction), transaction.version
+            )
+
+        return cached_response(entry)
 
     @doc(tags=["Transaction"])
     @use_kwargs(transaction_schema, location=("json"), apply=False)
     @marshal_with(transaction_schema, code=200, apply=False)
     def put(self, transaction_id: int) -> Tuple[Dict, int]:
-        json_data = request.get_json()
-        transaction_data = transaction_schema.load(json_data)
+        return self._update(transaction_id, partial=False)
+
+    @doc(tags=["Transaction"])
+    @use_kwargs(transaction_schema, location=("json"), apply=False)
+    @marshal_with(transaction_schema, code=200, apply=False)
+    def patch(self, transaction_id: int) -> Tuple[Dict, int]:
+        return self._update(transaction_id, partial=True)
+
+    def _update(self, transaction_id: int, partial: bool) -> Tuple[Dict, int]:
+        values = transaction_update_schema.load(request.get_json(), partial=partial)
+        names, columns = transaction_rows.select()
+
         try:
-            transaction = TransactionModel.find_by_id(transaction_id)
+            row = TransactionModel.update_by_id(
+                transaction_id, values, if_match_versions(), columns
+            )
+            if row is None:
+                if TransactionModel.find_by_id(transaction_id) is None:
+                    return {"message": NOT_FOUND}, 404
+                return {"message": PRECONDITION_FAILED}, 412
         except:
             return {"message": SERVER_ERROR}, 500
 
-        if transaction:
-            try:
-                transaction.receipt_num = transaction_data.receipt_num
-                transaction.account_id = transaction_data.account_id
-                transaction.customer_name = transaction_data.customer_name
-                transaction.description = transaction_data.description
-                transaction.amount = transaction_data.amount
-                transaction.payment_type = transaction_data.payment_type
-                transaction.utility = transaction_data.utility
-                transaction.service_charge = transaction_data.service_charge
-                transaction.balance_due = transaction_data.balance_due
-                transaction.processor = transaction_data.processor
-                transaction.user_id = transaction_data.user_id
-
-                transaction.save_to_db()
-                return transaction_schema.dump(transaction), 200
-            except:
-                return {"message": SERVER_ERROR}, 500
-
-        return {"message": NOT_FOUND}, 404
+        return updated_response(
+            ("transactions", transaction_id),
+            transaction_rows.dump([row], names)[0],
+            row.version,
+        )
 
     @doc(tags=["Transaction"])
     @marshal_with(transaction_schema, code=200, apply=False)
@@ -102,26 +191,105 @@ class Transaction(Resource, MethodResource):
 
 class TransactionList(Resource, MethodResource):
     @doc(tags=["Transaction"])
+    @use_kwargs(transaction_filter_schema, location=("query"), apply=False)
     @marshal_with(transaction_list, code=200, apply=False)
     # @jwt_required()
     def get(self) -> Tuple[Dict, int]:
-        try:
-            transactions = TransactionModel.get_all()
-        except:
-            return {"message": SERVER_ERROR}, 500
+        key = ("transactions", "list", request.query_string)
+        entry = response_cache.get(key)
+
+        if entry is None:
+            args = transaction_filter_schema.load(request.args)
+            limit, after = page_args((date.fromisoformat, int), args)
+            names, columns = transaction_rows.select(
+                args.get("only"), required=("date_entered", "transaction_id")
+            )
 
-        return {"transactions": transaction_list.dump(transactions)}, 200
+            try:
+                rows = TransactionModel.find_page_rows(columns, limit + 1, after, args)
+            except:
+                return {"message": SERVER_ERROR}, 500
+
+            rows, next_cursor = split_page(
+                rows, limit, lambda row: (row.date_entered, row.transaction_id)
+            )
+            entry = response_cache.set(
+                key,
+                transaction_rows.payload(
+                    "transactions", rows, names, args["format"], next_cursor
+                ),
+            )
+
+        return cached_response(entry)
 
 
 class TransactionSearch(Resource, MethodResource):
     @doc(tags=["Transaction"])
+    @use_kwargs(search_args_schema, location=("query"), apply=False)
     @marshal_with(transaction_list, code=200, apply=False)
     # @jwt_required()
     def get(self, term: str) -> Tuple[Dict, int]:
+        args = search_args_schema.load(request.args)
+        term = validate_term(term)
+        limit, after = page_args((cursor_offset,), args)
+        offset = after[0] if after else 0
+
         try:
-            results = TransactionModel.text_search(term)
+            if args["mode"] == "fuzzy":
+                results = TransactionModel.fuzzy_search(
+                    term,
+                    limit + 1,
+                    offset,
+                    TRANSACTION_RELATIONS,
+                    args.get("threshold"),
+                )
+            else:
+                results = TransactionModel.text_search(
+                    term, limit + 1, offset, TRANSACTION_RELATIONS, args["highlight"]
+                )
         except:
             return {"message": SERVER_ERROR}, 500
 
         if results:
-            return {"transactions": transaction_list.dump(results)}, 200
+            results, next_cursor = split_page(
+                results, limit, lambda _: (offset + limit,)
+            )
+            return encoded_response(
+                {
+                    "transactions": dump_hits(
+                        transaction_list, results, args["highlight"]
+                    ),
+                    "next": next_cursor,
+                }
+            )
+
+        return {"message": NOT_FOUND}, 404
+
+
+class TransactionExport(Resource, MethodResource):
+    @doc(tags=["Transaction"])
+    @use_kwargs(export_args_schema, location=("query"), apply=False)
+    def get(self) -> Response:
+        args = export_args_schema.load(request.args)
+
+        try:
+            result = TransactionModel.export_rows(
+                current_app.config["EXPORT_BATCH_SIZE"]
+            )
+        except:
+            return {"message": SERVER_ERROR}, 500
+
+        if args["format"] == "csv":
+            body, mimetype = csv_stream(result), "text/csv"
+        else:
+            body, mimetype = ndjson_stream(result), "application/x-ndjson"
+
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": "attachment; filename=transactions.{}".format(
+                    args["format"]
+                )
+            },
+        )
@@ -4,10 +4,18 @@ from flask_jwt_extended import create_access_token, create_refresh_token, jwt_re
 from werkzeug.security import safe_str_cmp
 from flask_restful import Resource
 from flask import request
-from common.blocklist import BLOCKLIST
+from common.blocklist import blocklist
 from models.user_model import UserModel
 from schemas.user_schema import UserSchema, LoginSchema
-import bcrypt
+from schemas.query_schema import list_args_schema, search_args_schema
+from common.serializers import RowSerializer
+from common.pagination import cursor_offset, page_args, split_page
+from common.cache import cached_response, response_cache, updated_response
+from common.encoding import encoded_response
+from common.versioning import PRECONDITION_FAILED, if_match_versions
+from common.search import dump_hits, validate_term
+from common.db import db
+from common.passwords import HashingBusy, password_hasher
 
 # from common.error_logger import logger
 
@@ -27,6 +35,11 @@ SERVER_ERROR = "Internal error, could not complete operation."
 user_schema = UserSchema()
 login_schema = LoginSchema()
 user_list_schema = UserSchema(many=True)
+user_update_schema = UserSchema(load_instance=False, exclude=("transaction",))
+user_rows = RowSerializer(UserSchema, "user_id")
+
+# Relationships dumped by the user schema, loaded up front with the query.
+USER_RELATIONS = ("transaction",)
 
 
 class UserRegistration(MethodResource, Resource):
@@ -37,12 +50,11 @@ class UserRegistration(MethodResource, Resource):
         user_json = request.get_json()
         user: UserModel = user_schema.load(user_json)
 
-        hashed = bcrypt.hashpw(user.password.encode("utf-8"), bcrypt.gensalt())
-        user.password = hashed.decode("ascii")
-
         if UserModel.find_by_username(user.user_name):
             return {"message": DUPLICATION_ERROR.format(user.user_name)}, 400
 
+        user.password = password_hasher.hash(user.password)
+
         try:
             user.save_to_db()
             return {"message": USER_CREATED.format(user.user_name)}, 201
@@ -54,37 +66,49 @@ class User(Resource, MethodResource):
     @doc(tags=["User"])
     @marshal_with(user_schema, apply=False)
     def get(self, user_id: int) -> Union[Dict, Tuple[Dict, int]]:
-        user = UserModel.find_by_id(user_id)
+        key = ("users", user_id)
+        entry = response_cache.get(key)
 
-        if not user:
-            return {"message": USER_NOT_FOUND}, 404
+        if entry is None:
+            user = UserModel.find_by_id(user_id, USER_RELATIONS)
 
-        return user_schema.dump(user)
+            if not user:
+                return {"message": USER_NOT_FOUND}, 404
+
+            entry = response_cache.set(key, user_schema.dump(user), user.version)
+
+        return cached_response(entry)
 
     @doc(tags=["User"])
     @use_kwargs(user_schema, location=("json"), apply=False)
     @marshal_with(user_schema, apply=False)
     def put(self, user_id: int) -> Tuple[Dict, int]:
-        user_json = request.get_json()
-        user_data = user_schema.load(user_json)
+        return self._update(user_id, partial=("password",))
+
+    @doc(tags=["User"])
+    @use_kwargs(user_schema, location=("json"), apply=False)
+    @marshal_with(user_schema, apply=False)
+    def patch(self, user_id: int) -> Tuple[Dict, int]:
+        return self._update(user_id, partial=True)
+
+    def _update(self, user_id: int, partial) -> Tuple[Dict, int]:
+        values = user_update_schema.load(request.get_json(), partial=partial)
+        # Passwords are only changed, and hashed, by UpdatePassword.
+        values.pop("password", None)
+        names, columns = user_rows.select()
+
         try:
-            user = UserModel.find_by_id(user_id)
+            row = UserModel.update_by_id(user_id, values, if_match_versions(), columns)
+            if row is None:
+                if UserModel.find_by_id(user_id) is None:
+                    return {"message": USER_NOT_FOUND}, 404
+                return {"message": PRECONDITION_FAILED}, 412
         except:
             return {"message": SERVER_ERROR}, 500
 
-        if user:
-            try:
-                user.user_name = user_data.user_name
-                user.fname = user_data.fname
-                user.lname = user_data.lname
-                user.role = user_data.role
-
-                user.save_to_db()
-                return user_schema.dump(user), 200
-            except:
-                return {"message": SERVER_ERROR}, 500
-
-        return {"message": USER_NOT_FOUND}, 404
+        return updated_response(
+            ("users", user_id), user_rows.dump([row], names)[0], row.version
+        )
 
     @doc(tags=["User"])
     @marshal_with(user_schema, apply=False)
@@ -100,27 +124,61 @@ class User(Resource, MethodResource):
 
 class AllUsers(Resource, MethodResource):
     @doc(tags=["User"])
+    @use_kwargs(list_args_schema, location=("query"), apply=False)
     @marshal_with(user_list_schema, code=200, apply=False)
     def get(cls) -> Tuple[Dict, int]:
-        try:
-            users = UserModel.find_all()
-        except:
-            return {"message": SERVER_ERROR}, 500
+        key = ("users", "list", request.query_string)
+        entry = response_cache.get(key)
+
+        if entry is None:
+            args = list_args_schema.load(request.args)
+            limit, after = page_args((int,), args)
+            names, columns = user_rows.select(args.get("only"), required=("user_id",))
+
+            try:
+                rows = UserModel.find_page_rows(columns, limit + 1, after)
+            except:
+                return {"message": SERVER_ERROR}, 500
 
-        return {"users": user_list_schema.dump(users)}, 200
+            rows, next_cursor = split_page(rows, limit, lambda row: (row.user_id,))
+            entry = response_cache.set(
+                key,
+                user_rows.payload("users", rows, names, args["format"], next_cursor),
+            )
+
+        return cached_response(entry)
 
 
 class UserSearch(Resource, MethodResource):
     @doc(tags=["User"])
+    @use_kwargs(search_args_schema, location=("query"), apply=False)
     @marshal_with(user_list_schema, code=200, apply=False)
     def get(self, term: str) -> Tuple[Dict, int]:
+        args = search_args_schema.load(request.args)
+        term = validate_term(term)
+        limit, after = page_args((cursor_offset,), args)
+        offset = after[0] if after else 0
+
         try:
-            users = UserModel.text_search(term)
+            if args["mode"] == "fuzzy":
+                users = UserModel.fuzzy_search(
+                    term, limit + 1, offset, USER_RELATIONS, args.get("threshold")
+                )
+            else:
+                users = UserModel.text_search(
+                    term, limit + 1, offset, USER_RELATIONS, args["highlight"]
+                )
         except:
             return {"message": SERVER_ERROR}, 500
 
         if users:
-            return {"users": user_list_schema.dump(users)}, 200
+            users, next_cursor = split_page(users, limit, lambda _: (offset + limit,))
+            return encoded_response(
+                {
+                    "users": dump_hits(user_list_schema, users, args["highlight"]),
+                    "next": next_cursor,
+                }
+            )
 
         return {"message": USER_NOT_FOUND}, 404
 
@@ -135,9 +193,14 @@ class UserLogin(Resource, MethodResource):
 
         user = UserModel.find_by_username(user_json["user_name"])
 
-        if user and bcrypt.checkpw(
-            password.encode("utf-8"), user.password.encode("utf-8")
-        ):
+        if user and password_hasher.verify(password, user.password):
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(password)
+                try:
+                    user.save_to_db()
+                except:
+                    db.session.rollback()  # Keep the old hash, try again next login.
+
             access_token = create_access_token(identity=user.user_id, fresh=True)
             refresh_token = create_refresh_token(user.user_id)
 
@@ -151,8 +214,8 @@ class UserLogout(Resource, MethodResource):
     @use_kwargs({"Authorization": fields.Str()}, location=("headers"), apply=False)
     @jwt_required()
     def post(self) -> Tuple[Dict, int]:
-        jti = get_jwt()["jti"]
-        BLOCKLIST.add(jti)
+        token = get_jwt()
+        blocklist.add(token["jti"], token["exp"])
 
         return {"message": LOG_OUT}, 200
 
@@ -176,16 +239,15 @@ class UpdatePassword(Resource):
             user = UserModel.find_by_id(user_id)
 
             if user:
-                new_password = user_data.password.encode("utf-8")
-                user.password = bcrypt.hashpw(new_password, bcrypt.gensalt()).decode(
-                    "ascii"
-                )
+                user.password = password_hasher.hash(user_data.password)
 
                 user.save_to_db()
                 return user_schema.dump(user), 200
             else:
                 return {"message": USER_NOT_FOUND}, 404
 
+        except HashingBusy:
+            raise
         except Exception as err:
             # logger.error(err, exc_info=True)
             return {"message": SERVER_ERROR}, 500
@@ -1,12 +1,17 @@
 from flask_sqlalchemy import model
 from common.marshal import marshy
+from common.metrics import TimedDumpMixin
 from models.customer_model import CustomerModel
 
 
-class CustomerSchema(marshy.SQLAlchemyAutoSchema):
+class CustomerSchema(TimedDumpMixin, marshy.SQLAlchemyAutoSchema):
+    # Transactions are keyed by (transaction_id, date_entered) since they were
+    # partitioned; keep dumping bare ids.
+    transaction = marshy.auto_field(columns=("transaction_id",))
+
     class Meta:
         model = CustomerModel
-        dump_only = ("account_id",)
+        dump_only = ("account_id", "version", "current_balance")
         exclude = ("__ts_vector__",)
         include_relationships = True
         load_instance = True
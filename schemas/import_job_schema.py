@@ -0,0 +1,7 @@
+from common.marshal import marshy
+from models.import_job_model import ImportJobModel
+
+
+class ImportJobSchema(marshy.SQLAlchemyAutoSchema):
+    class Meta:
+        model = ImportJobModel
@@ -0,0 +1,84 @@
+from marshmallow import Schema, ValidationError, fields, validate, validates_schema
+from webargs.fields import DelimitedList
+
+REPORT_GROUPS = ("date_entered", "utility", "payment_type", "processor", "account_id")
+
+
+class PageArgsSchema(Schema):
+    limit = fields.Int(validate=validate.Range(min=1))
+    cursor = fields.Str()
+
+
+class ListArgsSchema(PageArgsSchema):
+    only = DelimitedList(fields.Str(), data_key="fields")
+    format = fields.Str(
+        load_default="objects", validate=validate.OneOf(("objects", "columns"))
+    )
+
+
+class SearchArgsSchema(PageArgsSchema):
+    highlight = fields.Bool(load_default=False)
+    mode = fields.Str(load_default="text", validate=validate.OneOf(("text", "fuzzy")))
+    threshold = fields.Float(validate=validate.Range(min=0, max=1))
+
+
+class UnifiedSearchArgsSchema(Schema):
+    q = fields.Str(required=True)
+    limit = fields.Int(validate=validate.Range(min=1))
+
+
+class ExportArgsSchema(Schema):
+    format = fields.Str(
+        load_default="ndjson", validate=validate.OneOf(("ndjson", "csv"))
+    )
+
+
+class DateRangeSchema(Schema):
+    start = fields.Date()
+    end = fields.Date()
+
+    @validates_schema
+    def validate_range(self, data, **kwargs):
+        if "start" in data and "end" in data and data["start"] > data["end"]:
+            raise ValidationError("start must not be after end.", "start")
+
+
+class ReportArgsSchema(DateRangeSchema):
+    group_by = DelimitedList(
+        fields.Str(validate=validate.OneOf(REPORT_GROUPS)), load_default=[]
+    )
+
+
+class StatementArgsSchema(PageArgsSchema, DateRangeSchema):
+    pass
+
+
+class TransactionFilterSchema(ListArgsSchema, DateRangeSchema):
+    account_id = fields.Int()
+    user_id = fields.Int()
+    utility = fields.Str()
+    payment_type = fields.Str()
+    processor = fields.Str()
+    min_amount = fields.Int()
+    max_amount = fields.Int()
+
+    @validates_schema
+    def validate_amounts(self, data, **kwargs):
+        if (
+            "min_amount" in data
+            and "max_amount" in data
+            and data["min_amount"] > data["max_amount"]
+        ):
+            raise ValidationError(
+                "min_amount must not exceed max_amount.", "min_amount"
+            )
+
+
+page_args_schema = PageArgsSchema()
+list_args_schema = ListArgsSchema()
+search_args_schema = SearchArgsSchema()
+unified_search_args_schema = UnifiedSearchArgsSchema()
+export_args_schema = ExportArgsSchema()
+report_args_schema = ReportArgsSchema()
+statement_args_schema = StatementArgsSchema()
+transaction_filter_schema = TransactionFilterSchema()
@@ -0,0 +1,33 @@
+from marshmallow import Schema, fields
+
+
+class TransactionTotalsSchema(Schema):
+    date_entered = fields.Date()
+    utility = fields.Str()
+    payment_type = fields.Str()
+    processor = fields.Str()
+    account_id = fields.Int()
+    count = fields.Int()
+    amount = fields.Int()
+    service_charge = fields.Int()
+    balance_due = fields.Int()
+
+
+class StatementLineSchema(Schema):
+    transaction_id = fields.Int()
+    date_entered = fields.Date()
+    receipt_num = fields.Str()
+    description = fields.Str()
+    utility = fields.Str()
+    payment_type = fields.Str()
+    amount = fields.Int()
+    service_charge = fields.Int()
+    balance_due = fields.Int()
+    balance = fields.Int()
+
+
+class StatementSchema(Schema):
+    account_id = fields.Int()
+    current_balance = fields.Int()
+    transactions = fields.List(fields.Nested(StatementLineSchema))
+    next = fields.Str(allow_none=True)
@@ -1,14 +1,14 @@
 from common.marshal import marshy
+from common.metrics import TimedDumpMixin
 from models.transaction_model import TransactionModel
 from models.customer_model import CustomerModel
 from models.user_model import UserModel
 
 
-class TransactionSchema(marshy.SQLAlchemyAutoSchema):
+class TransactionSchema(TimedDumpMixin, marshy.SQLAlchemyAutoSchema):
     class Meta:
         model = TransactionModel
-        dump_only = ("transaction_id",)
-        dump_only = ("date_entered",)
+        dump_only = ("transaction_id", "date_entered", "version")
         exclude = ("__ts_vector__",)
         include_fk = True
         include_relationships = True
@@ -1,13 +1,18 @@
 from marshmallow import fields, Schema
 from common.marshal import marshy
+from common.metrics import TimedDumpMixin
 from models.user_model import UserModel
 
 
-class UserSchema(marshy.SQLAlchemyAutoSchema):
+class UserSchema(TimedDumpMixin, marshy.SQLAlchemyAutoSchema):
+    # Transactions are keyed by (transaction_id, date_entered) since they were
+    # partitioned; keep dumping bare ids.
+    transaction = marshy.auto_field(columns=("transaction_id",))
+
     class Meta:
         model = UserModel
         load_only = ("password",)
-        dump_only = ("user_id",)
+        dump_only = ("user_id", "version")
         exclude = ("__ts_vector__",)
         include_relationships = True
         load_instance = True
@@ -0,0 +1,102 @@
+"""Fixtures for tests against a real Postgres database.
+
+TEST_DATABASE_URI must name a scratch database: its public schema is dropped
+and rebuilt by the migrations at the start of the run. Everything else is
+configured as for the application, through .env and APPLICATON_SETTINGS.
+"""
+import os
+
+import bcrypt
+import pytest
+
+from app import create_app
+from common import migrate
+from common.cache import response_cache
+from common.db import db
+from models.customer_model import CustomerModel
+from models.transaction_model import TransactionModel
+from models.user_model import UserModel
+
+CUSTOMERS = 5
+USERS = 3
+TRANSACTIONS = 12
+
+
+def _seed() -> None:
+    password = bcrypt.hashpw(b"password", bcrypt.gensalt(4)).decode("ascii")
+    db.session.add_all(
+        UserModel(
+            user_name=f"clerk{number}",
+            fname="Sam",
+            lname=f"Clerk{number}",
+            password=password,
+            role="Admin" if number == 1 else "Standard",
+        )
+        for number in range(1, USERS + 1)
+    )
+    db.session.add_all(
+        CustomerModel(
+            fname="Ann",
+            lname=f"Brown{number}",
+            address=f"{number} Hope Road",
+            email=f"ann{number}@ex.test",
+            tel_num="8761234567",
+            mobile_num="8767654321",
+            service_type="residential",
+            comments="",
+        )
+        for number in range(1, CUSTOMERS + 1)
+    )
+    db.session.flush()
+    db.session.add_all(
+        TransactionModel(
+            receipt_num=f"R{number:05d}",
+            account_id=number % CUSTOMERS + 1,
+            customer_name=f"Ann Brown{number % CUSTOMERS + 1}",
+            description="monthly bill",
+            amount=1000 + number,
+            payment_type="cash" if number % 2 else "card",
+            utility="water" if number % 3 else "electricity",
+            service_charge=100,
+            balance_due=number * 10,
+            processor="front desk",
+            user_id=number % USERS + 1,
+        )
+        for number in range(1, TRANSACTIONS + 1)
+    )
+    db.session.commit()
+
+
+@pytest.fixture(scope="session")
+def app():
+    uri = os.environ.get("TEST_DATABASE_URI")
+    if not uri:
+        pytest.skip("TEST_DATABASE_URI is not set")
+
+    app = create_app()
+    # Every request has to reach the database for its statements to count.
+    app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI=uri, RESPONSE_CACHE_SIZE=0)
+    response_cache.init_app(app)
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "DROP SCHEMA public CASCADE; CREATE SCHEMA public"
+            )
+        migrate.upgrade(db.engine)
+        _seed()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def session(app):
+    # Requests share the session's app context, so nothing else ends their
+    # transaction and its locks would block the partition DDL.
+    yield
+    db.session.remove()
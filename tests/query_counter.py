@@ -0,0 +1,46 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from sqlalchemy import event
+
+from common.db import db
+
+
+class QueryCounter:
+    """Records every SQL statement executed on an engine while active."""
+
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        if self.engine is None:
+            self.engine = db.engine
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+@contextmanager
+def assert_num_queries(expected: int, engine=None) -> Iterator[QueryCounter]:
+    """Fail if the wrapped block does not run exactly `expected` statements.
+
+    Must be used inside an application context, e.g. around
+    `app.test_client().get("/customers")`, so regressions back to per-row
+    relationship loading show up as a statement count mismatch.
+    """
+    with QueryCounter(engine) as counter:
+        yield counter
+
+    assert counter.count == expected, "Expected {} statements, got {}:\n{}".format(
+        expected, counter.count, "\n".join(counter.statements)
+    )
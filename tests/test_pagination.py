@@ -0,0 +1,24 @@
+import pytest
+
+from common.pagination import INVALID_CURSOR, encode_cursor
+
+SEARCHES = (
+    "/customers/search/Brown1",
+    "/transactions/search/monthly",
+    "/users/search/Clerk1",
+)
+
+
+@pytest.mark.parametrize("path", SEARCHES)
+def test_search_rejects_negative_offset(client, path):
+    response = client.get(path, query_string={"cursor": encode_cursor([-5])})
+
+    assert response.status_code == 400
+    assert INVALID_CURSOR in response.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("path", SEARCHES)
+def test_search_follows_offset_cursor(client, path):
+    response = client.get(path, query_string={"cursor": encode_cursor([0])})
+
+    assert response.status_code == 200
@@ -0,0 +1,90 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from common.db import db
+from common.partitions import (
+    ARCHIVE_SCHEMA,
+    DEFAULT_PARTITION,
+    archive_command,
+    create_partitions,
+)
+from models.daily_total_model import DailyTotalModel
+from models.transaction_model import TransactionModel
+
+
+def test_create_partitions_moves_stranded_rows(app):
+    months = (date(2040, 1, 1), date(2040, 2, 1))
+    connection = db.engine.connect()
+    transaction = connection.begin()
+    try:
+        for month in months:
+            connection.execute(
+                text(
+                    "INSERT INTO transactions (receipt_num, date_entered, "
+                    "account_id, customer_name, description, amount, payment_type, "
+                    "utility, service_charge, balance_due, processor, user_id) "
+                    "VALUES ('S1', :day, 1, 'Ann Brown1', 'stranded', 1, 'cash', "
+                    "'water', 0, 0, 'front desk', 1)"
+                ),
+                {"day": month.replace(day=15)},
+            )
+
+        created = create_partitions(connection, *months)
+
+        assert created == ["transactions_y2040m01", "transactions_y2040m02"]
+        assert not connection.scalar(
+            text(f"SELECT count(*) FROM {DEFAULT_PARTITION} WHERE receipt_num = 'S1'")
+        )
+        for name in created:
+            assert connection.scalar(text(f"SELECT count(*) FROM {name}")) == 1
+    finally:
+        transaction.rollback()
+        connection.close()
+
+
+def test_archive_drops_the_years_daily_totals(app):
+    day = date(2001, 3, 15)
+    with db.engine.begin() as connection:
+        create_partitions(connection, day, day)
+    TransactionModel.bulk_insert(
+        [
+            dict(
+                receipt_num="A1",
+                date_entered=day,
+                account_id=1,
+                customer_name="Ann Brown1",
+                description="archived",
+                amount=1,
+                payment_type="cash",
+                utility="water",
+                service_charge=0,
+                balance_due=0,
+                processor="front desk",
+                user_id=1,
+            )
+        ]
+    )
+    assert DailyTotalModel.query.filter_by(date_entered=day).count() == 1
+
+    try:
+        result = app.test_cli_runner().invoke(archive_command, ["2001"])
+
+        assert result.exit_code == 0, result.output
+        assert DailyTotalModel.query.filter_by(date_entered=day).count() == 0
+        assert not TransactionModel.query.filter_by(receipt_num="A1").count()
+    finally:
+        db.session.rollback()
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                f"DROP TABLE IF EXISTS {ARCHIVE_SCHEMA}.transactions_y2001m03"
+            )
+
+
+def test_related_transactions_dump_as_ids(client):
+    # Transactions have a composite key since partitioning; dump only the id.
+    for path in ("/customer/1", "/user/1"):
+        transactions = client.get(path).get_json()["transaction"]
+
+        assert transactions
+        assert all(isinstance(item, int) for item in transactions)
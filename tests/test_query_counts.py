@@ -0,0 +1,27 @@
+import pytest
+
+from tests.query_counter import assert_num_queries
+
+# Statements each endpoint runs, whatever the number of rows it returns.
+ENDPOINTS = [
+    ("/customers", 1),
+    ("/transactions", 1),
+    ("/users", 1),
+    ("/customer/1", 2),
+    ("/transaction/1", 1),
+    ("/user/1", 2),
+    ("/customers/search/Brown1", 2),
+    ("/transactions/search/monthly", 1),
+    ("/users/search/Clerk1", 2),
+    ("/customer/1/statement", 2),
+    ("/reports/transactions?group_by=utility", 1),
+    ("/search?q=Brown", 1),
+]
+
+
+@pytest.mark.parametrize("path,expected", ENDPOINTS)
+def test_statement_count(client, path, expected):
+    with assert_num_queries(expected):
+        response = client.get(path)
+
+    assert response.status_code == 200
@@ -0,0 +1,178 @@
+import os
+import time
+
+import pytest
+from flask import g
+
+from common.cache import ResponseCache
+from common.db import db
+from common.replicas import PRIMARY_COOKIE, ReplicaRouter, _route_request, replicas
+from models.customer_model import CustomerModel
+from tests.query_counter import QueryCounter
+
+KEY = ("customers", 1)
+
+
+def _cache() -> ResponseCache:
+    cache = ResponseCache()
+    cache.max_size, cache.ttl, cache.replica_ttl = 10, 60, 5
+    return cache
+
+
+@pytest.fixture
+def replica(app):
+    """The replica engine, with GET requests routed to TEST_REPLICA_URI.
+
+    TEST_REPLICA_URI must name the test database on a replica of the server
+    behind TEST_DATABASE_URI, e.g. one made with `pg_basebackup -R`.
+    """
+    uri = os.environ.get("TEST_REPLICA_URI")
+    if not uri:
+        pytest.skip("TEST_REPLICA_URI is not set")
+
+    app.config["SQLALCHEMY_REPLICA_URIS"] = [uri]
+    replicas.init_app(app)
+    yield replicas._engine(uri)
+
+    app.before_request_funcs[None].remove(_route_request)
+    app.after_request_funcs[None].remove(replicas._stick_to_primary)
+    app.config["SQLALCHEMY_REPLICA_URIS"] = []
+    replicas.dispose()
+    replicas.init_app(app)
+    replicas._lags.clear()
+    replicas._checked.clear()
+
+
+def _served(client, replica, method: str, path: str, **kwargs):
+    """The response, and whether the primary and the replica ran statements."""
+    with QueryCounter() as primary, QueryCounter(replica) as secondary:
+        response = client.open(path, method=method, **kwargs)
+
+    return response, bool(primary.count), bool(secondary.count)
+
+
+def test_get_reads_from_replica(client, replica):
+    response, primary, secondary = _served(client, replica, "GET", "/customer/1")
+
+    assert response.status_code == 200
+    assert (primary, secondary) == (False, True)
+    assert PRIMARY_COOKIE not in response.headers.get("Set-Cookie", "")
+
+
+@pytest.mark.parametrize("method", ("PUT", "PATCH"))
+def test_updates_use_primary(client, replica, method):
+    body = client.get("/customer/5").get_json()
+    if method == "PATCH":
+        body = {"comments": body["comments"]}
+    else:
+        for field in ("account_id", "version", "current_balance", "transaction"):
+            body.pop(field)
+
+    response, primary, secondary = _served(
+        client, replica, method, "/customer/5", json=body
+    )
+
+    assert response.status_code == 200, response.get_json()
+    assert (primary, secondary) == (True, False)
+    assert PRIMARY_COOKIE in response.headers["Set-Cookie"]
+
+
+def test_post_uses_primary(client, replica):
+    body = dict(
+        fname="Rae",
+        lname="Replica",
+        address="1 Lag Lane",
+        email="rae@ex.test",
+        tel_num="8761234567",
+        mobile_num="8767654321",
+        service_type="residential",
+        comments="",
+    )
+    response, primary, secondary = _served(
+        client, replica, "POST", "/customer/new", json=body
+    )
+
+    try:
+        assert response.status_code == 201, response.get_json()
+        assert (primary, secondary) == (True, False)
+    finally:
+        CustomerModel.query.filter_by(lname="Replica").delete()
+        db.session.commit()
+
+
+def test_flush_in_read_request_uses_primary(app, replica):
+    with app.test_request_context("/customer/1"):
+        _route_request()
+        with QueryCounter() as primary, QueryCounter(replica) as secondary:
+            db.session.add(
+                CustomerModel(
+                    fname="Rae",
+                    lname="Flushed",
+                    address="1 Lag Lane",
+                    email="rae@ex.test",
+                    tel_num="8761234567",
+                    mobile_num="8767654321",
+                    service_type="residential",
+                    comments="",
+                )
+            )
+            db.session.flush()
+        db.session.rollback()
+
+    assert any(s.startswith("INSERT INTO customers") for s in primary.statements)
+    assert not secondary.count
+
+
+def test_write_pins_client_to_primary(client, replica):
+    client.patch("/customer/5", json={"comments": ""})
+
+    response, primary, secondary = _served(client, replica, "GET", "/customer/1")
+
+    assert response.status_code == 200
+    assert (primary, secondary) == (True, False)
+
+
+def test_lagging_replica_falls_back_to_primary(client, replica):
+    uri = replicas.uris[0]
+    replicas._lags[uri] = replicas.max_lag + 1
+    replicas._checked[uri] = time.monotonic()
+
+    response, primary, secondary = _served(client, replica, "GET", "/customer/1")
+
+    assert response.status_code == 200
+    assert (primary, secondary) == (True, False)
+
+
+def test_replica_reads_expire_within_max_lag(app):
+    cache = _cache()
+    with app.test_request_context("/customer/1"):
+        g.read_replica, g.replica_engine = True, db.engine
+        entry = cache.set(KEY, {"account_id": 1})
+
+    assert cache.get(KEY) == entry
+    assert entry.expires <= time.monotonic() + cache.replica_ttl
+
+
+def test_pinned_client_skips_cache(app):
+    cache = _cache()
+    cache.set(KEY, {"account_id": 1})
+    cookie = f"{PRIMARY_COOKIE}={time.time() + 60}"
+    with app.test_request_context("/customer/1", headers={"Cookie": cookie}):
+        _route_request()
+        assert cache.get(KEY) is None
+
+    assert cache.get(KEY) is not None
+
+
+def test_lag(app):
+    router = ReplicaRouter()
+    router.init_app(app)
+    unreachable = "postgresql://postgres@127.0.0.1:1/herb"
+
+    # A stand-alone server is never behind; one that can't be reached is
+    # skipped, and isn't probed again within the check interval.
+    assert router.lag(os.environ["TEST_DATABASE_URI"]) == 0
+    assert router.lag(unreachable) == float("inf")
+    router._lags[unreachable] = 0.0
+    assert router.lag(unreachable) == 0.0
+    router.dispose()
@@ -0,0 +1,28 @@
+import pytest
+
+from common.db import db
+from common.serializers import _normalised
+from resources.customer import customer_rows
+from resources.transaction import transaction_rows
+from resources.user import user_rows
+
+
+@pytest.mark.parametrize(
+    "serializer",
+    (customer_rows, transaction_rows, user_rows),
+    ids=lambda serializer: serializer.key,
+)
+def test_row_serializer_matches_schema(app, serializer):
+    model = serializer.schema_cls.Meta.model
+    key = getattr(model, serializer.key)
+    names, columns = serializer.select()
+
+    rows = db.session.query(*columns).select_from(model).order_by(key).all()
+    fast = [_normalised(item) for item in serializer.dump(rows, names)]
+    instances = model.query.order_by(key).all()
+    expected = [
+        _normalised(item) for item in serializer.schema_cls(many=True).dump(instances)
+    ]
+
+    assert fast
+    assert fast == expected
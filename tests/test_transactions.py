@@ -0,0 +1,14 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "field,value", (("transaction_id", 999), ("date_entered", "2020-01-01"))
+)
+def test_update_cannot_rewrite_key(client, field, value):
+    before = client.get("/transaction/2").get_json()
+
+    response = client.patch("/transaction/2", json={field: value})
+
+    assert response.status_code == 400
+    assert field in response.get_json()
+    assert client.get("/transaction/2").get_json() == before
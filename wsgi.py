@@ -0,0 +1,16 @@
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+from app import create_app
+from common.db import db
+from common.importer import customer_importer
+from common.migrate import check_schema_version
+from common.partitions import create_future_partitions
+
+app = create_app()
+check_schema_version(app)
+create_future_partitions(app)
+# Runs once, in the gunicorn master: gunicorn.conf.py preloads the app.
+customer_importer.fail_abandoned()
+
+# Workers are forked from this process, they must not inherit its connections.
+with app.app_context():
+    db.engine.dispose()